@@ -1,2 +1,8 @@
 from .base import Case_Directory
 from .boundary_probe import Boundary_Probe
+from .post_processing import Post_Processing
+from .solver_log import Solver_Log
+from .async_process import set_max_concurrency
+from .sweep import Sweep
+from .parse_cache import set_parse_cache
+from .sampling import Line, Points, Plane
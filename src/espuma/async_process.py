@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+import asyncio
+
+from pathlib import Path
+from collections import deque
+from weakref import WeakKeyDictionary
+from typing import Callable, Optional
+
+from .solver_log import STDERR_LINES
+
+## Processes run at once by the async methods of Case_Directory, across all cases
+_max_concurrency = os.cpu_count() or 1
+_semaphores: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = WeakKeyDictionary()
+
+## Seconds given to a cancelled process to exit before it is killed
+TERMINATE_TIMEOUT = 5.0
+
+
+def set_max_concurrency(n: int) -> None:
+    """Limit the processes run at once by the async methods of Case_Directory"""
+    global _max_concurrency
+
+    if n < 1:
+        raise ValueError(f"Concurrency must be at least 1. Got {n}")
+
+    _max_concurrency = n
+    _semaphores.clear()
+
+
+def concurrency_limit() -> asyncio.Semaphore:
+    """Semaphore shared by everything running on the current event loop"""
+    loop = asyncio.get_running_loop()
+
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(_max_concurrency)
+
+    return _semaphores[loop]
+
+
+async def run_async(
+    command: list[str],
+    cwd: str | Path,
+    on_line: Optional[Callable[[str], Optional[bool]]] = None,
+    capture: bool = False,
+) -> str:
+    """
+    Run `command` once the concurrency limit allows it.
+
+    Parameters
+    ----------
+    command : list[str]
+        Command and arguments.
+    cwd : str | Path
+        Working directory.
+    on_line : callable, optional
+        Called with every line of stdout. The process is killed, without
+        raising, if it returns False.
+    capture : bool
+        Return the whole stdout. Otherwise only its last lines are kept,
+        for the error message.
+
+    Returns
+    -------
+    str
+        stdout if `capture`, else an empty string.
+
+    Raises
+    ------
+    OSError
+        If the process fails, with the command, stdout and stderr.
+
+    If the task is cancelled or `on_line` raises, the process is
+    terminated, and killed if it does not exit within `TERMINATE_TIMEOUT`
+    seconds.
+    """
+    async with concurrency_limit():
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        stdout = [] if capture else deque(maxlen=STDERR_LINES)
+        stderr = deque(maxlen=STDERR_LINES)
+        killed = False
+
+        async def drain_stderr():
+            async for line in process.stderr:
+                stderr.append(line.decode("utf-8", errors="replace"))
+
+        stderr_task = asyncio.create_task(drain_stderr())
+
+        try:
+            async for line in process.stdout:
+                line = line.decode("utf-8", errors="replace")
+                stdout.append(line)
+
+                if on_line is not None and on_line(line) is False and not killed:
+                    killed = True
+                    process.kill()
+
+            await stderr_task
+            returncode = await process.wait()
+
+        finally:
+            ## Cancelled, or on_line raised: the process must not outlive the task
+            stderr_task.cancel()
+            await _terminate(process)
+
+    if returncode != 0 and not killed:
+        raise OSError(
+            " ".join(command) + "\n\n" + "".join(stdout).strip() + "\n\n" + "".join(stderr).strip()
+        )
+
+    return "".join(stdout) if capture else ""
+
+
+async def _terminate(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+
+    process.terminate()
+
+    try:
+        await asyncio.wait_for(process.wait(), TERMINATE_TIMEOUT)
+
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
@@ -1,34 +1,168 @@
 from __future__ import annotations
 
 import subprocess
+import asyncio
 import os
-
-from math import isclose
+import stat
+import mmap
+import re
+import shutil
+import tempfile
+import weakref
+
+from math import inf, isclose
 from pathlib import Path
 from dataclasses import dataclass
 from functools import partial, cached_property
-from typing import Any, Optional
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Optional
 from shutil import rmtree
 
 import numpy as np
 import xarray as xr
+import netCDF4
 import pyvista as pv
 from pyvista import POpenFOAMReader
 
 import warnings
 
+from .foam_parser import (
+    OpenFoam_List,
+    parse_file,
+    set_entry,
+    remove_entry,
+    splice_entry,
+    write_list,
+    format_file,
+    parse_list_file,
+)
+from .solver_log import Solver_Log, Solver_Run, Time_Step
+from .async_process import run_async as run_process_async, concurrency_limit
+from .time_folders import is_time, scan_times, Time_Watcher
+from .parse_cache import cached_parse, invalidate
+from .sampling import Line, Sample, Interpolation
+
 ### Run as subprocess: ###############################
 run = partial(subprocess.run, capture_output=True, text=True, encoding="utf-8")
-run_solver = partial(
-    subprocess.run,
-    stdout=subprocess.DEVNULL,
-    stderr=subprocess.PIPE,
-    text=True,
-    encoding="utf-8",
-)
+
+
+def run_solver(command: list[str], cwd: Optional[str | Path] = None) -> subprocess.CompletedProcess:
+    """
+    Deprecated, use `Case_Directory.solve` or `Solver_Run`. Run `command`
+    until it exits, discarding stdout. `stderr` holds its last lines.
+    """
+    warnings.warn(
+        "run_solver is deprecated, use Case_Directory.solve or Solver_Run",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+
+    with Solver_Run(command, Path(cwd or ".")) as solver:
+        for _ in solver:
+            pass
+
+        returncode = solver.process.wait()
+
+    return subprocess.CompletedProcess(command, returncode, None, solver.stderr)
+
+
 ######################################################
 
 
+@contextmanager
+def atomic_open(path: Path):
+    """
+    Open a temporary file next to `path` for binary writing. It replaces
+    `path` in a single rename only if the block finishes without errors.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+
+        if path.exists():
+            shutil.copymode(path, tmp)
+
+        os.replace(tmp, path)
+        invalidate(path)
+
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def read_memmap(path: Path, shape: tuple[int, ...]) -> np.ndarray:
+    """Read-only float64 view of `path`. Empty files cannot be mapped"""
+    if 0 in shape:
+        return np.empty(shape)
+
+    return np.memmap(path, dtype=np.float64, mode="r", shape=shape)
+
+
+## Folders in constant/ that are linked instead of copied when cloning a case,
+## and whether they can be hardlinked. Mesh tools (blockMesh, snappyHexMesh,
+## refineMesh...) write polyMesh in place, which would go through a hardlink
+## to the template, so it is only reflinked (copy-on-write) or copied.
+LINKED_FOLDERS = {"polyMesh": False, "triSurface": True}
+
+## ioctl request to clone a file's extents (copy-on-write) on Linux
+FICLONE = 0x40049409
+
+
+def _reflink(source: str | Path, target: str | Path) -> None:
+    import fcntl
+
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _link_or_copy(source: str | Path, target: str | Path, hardlink: bool = True) -> None:
+    """
+    Share the data of `source` with `target`: a copy-on-write reflink where
+    the filesystem supports it, else a hardlink if allowed, else a regular
+    copy.
+    """
+    try:
+        _reflink(source, target)
+        return
+    except (OSError, ImportError):
+        Path(target).unlink(missing_ok=True)
+
+    if not hardlink:
+        shutil.copy2(source, target)
+        return
+
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _unlink_shared(folder: Path) -> None:
+    """Remove hardlinked files in `folder`, so they are not edited in place"""
+    if not folder.is_dir():
+        return
+
+    for f in folder.rglob("*"):
+        if f.is_file() and f.stat().st_nlink > 1:
+            f.unlink()
+
+
+def _zero_folders(path: Path) -> list[Path]:
+    zeros = []
+
+    for folder in path.glob("0*"):
+        try:
+            if folder.is_dir() and float(folder.name) == 0:
+                zeros.append(folder)
+        except ValueError:
+            continue
+
+    return zeros
+
+
 @dataclass(slots=True, frozen=True)
 class Dimension:
     mass: int = 0
@@ -66,11 +200,30 @@ class OpenFoam_Dict(dict):
 
     def __getitem__(self, key: str) -> Any:
         # print(f"Calling the {type(self).__name__} getittem for {key}")
-        if "." in key:
+        if super().__contains__(key):
+            return super().__getitem__(key)
+
+        elif "." in key:
             prekey, poskey = key.split(".", maxsplit=1)
             return self[prekey][poskey]
+
         else:
-            return super().__getitem__(key)
+            return self._match_pattern(key)
+
+    def _match_pattern(self, key: str) -> Any:
+        """
+        Quoted keywords are regular expressions in OpenFOAM. As in OpenFOAM,
+        the last pattern that matches the key takes precedence.
+        """
+        for k in reversed(self.keys()):
+            if len(k) > 1 and k.startswith('"') and k.endswith('"'):
+                try:
+                    if re.fullmatch(k[1:-1], key):
+                        return super().__getitem__(k)
+                except re.error:
+                    continue
+
+        raise KeyError(key)
 
     def __setitem__(self, key: Any, value: Any) -> None:
         raise NotImplementedError(
@@ -87,6 +240,10 @@ class OpenFoam_Dict(dict):
     def __repr__(self) -> str:
         return super().__repr__()
 
+    def __reduce__(self):
+        ## Pickled as pairs, since __setitem__ is disabled
+        return type(self), (list(self.items()),)
+
     def _repr_html_(self) -> str:
         vreprs = [v._repr_html_() if hasattr(v, "_repr_html_") else str(v) for v in self.values()]
 
@@ -100,9 +257,12 @@ class OpenFoam_Dict(dict):
 class OpenFoam_File:
     """
     Base class for openFOAM files.
+
+    Entries are read by parsing the file in Python. Set `use_foamDictionary`
+    to query every entry through the `foamDictionary` utility instead.
     """
 
-    def __init__(self, path: str | Path) -> None:
+    def __init__(self, path: str | Path, use_foamDictionary: bool = False) -> None:
         path = Path(path)
 
         if not path.exists():
@@ -112,6 +272,10 @@ class OpenFoam_File:
             raise FileNotFoundError("Path is not file")
 
         self.path = path
+        self.use_foamDictionary = use_foamDictionary
+
+        ## Values derived from the parsed file, with the tree they come from
+        self._derived: dict[str, tuple[OpenFoam_Dict, Any]] = {}
 
     def __str__(self) -> str:
         return str(self.path)
@@ -120,17 +284,45 @@ class OpenFoam_File:
         return f"{type(self).__name__}({self.path})"
 
     def __setitem__(self, key: Any, item: Any) -> None:
-        self._foamDictionary_set_value(key, item)
+        if self.use_foamDictionary:
+            self._foamDictionary_set_value(key, item)
+            self._clear_cache()
+            return
 
-        if "_keywords" in self.__dict__:
-            del self._keywords
+        with self.edit() as changes:
+            changes[key] = item
 
     def __getitem__(self, key: Any) -> Any:
         # print(f"Calling the {type(self).__name__} getittem for {key}")
-        return self.foamDictionary_generate_dict(key)
+        return self.generate_dict(key)
 
     def __delitem__(self, key) -> None:
-        self._foamDictionary_del_value(key)
+        if self.use_foamDictionary:
+            self._foamDictionary_del_value(key)
+            self._clear_cache()
+            return
+
+        with self.edit() as changes:
+            del changes[key]
+
+    @contextmanager
+    def edit(self):
+        """
+        Queue several changes and write them to disk in a single pass.
+
+        >>> with case.system.controlDict.edit() as d:
+        ...     d["endTime"] = 10
+        ...     d["writeInterval"] = 0.5
+
+        Nothing is written if the block raises an exception.
+        """
+        changes = File_Edit(self)
+        yield changes
+        changes.commit()
+
+    def _clear_cache(self) -> None:
+        self._derived.clear()
+        invalidate(self.path)
 
     def _repr_html_(self):
         head = (
@@ -185,6 +377,42 @@ class OpenFoam_File:
 
         return value.stdout.strip()
 
+    @property
+    def _dictionary(self) -> OpenFoam_Dict:
+        """
+        Parsed file, shared by every object of the process and parsed again
+        only when the file changes. See `espuma.parse_cache`.
+        """
+        return cached_parse(self.path, _parse_dictionary)
+
+    def _derive(self, name: str, compute: Callable[[], Any]) -> Any:
+        """`compute()`, kept until the file changes"""
+        tree = None if self.use_foamDictionary else self._dictionary
+        derived = self._derived.get(name)
+
+        if derived is None or derived[0] is not tree:
+            derived = (tree, compute())
+            self._derived[name] = derived
+
+        return derived[1]
+
+    def generate_dict(self, entry: Optional[str] = None) -> OpenFoam_Dict | str:
+        """
+        Return the entry (or the whole file if None) as an OpenFoam_Dict
+        for dictionaries, or as a string for primitive entries.
+        """
+        if self.use_foamDictionary:
+            return self.foamDictionary_generate_dict(entry)
+
+        if not entry:
+            return self._dictionary
+
+        try:
+            return self._dictionary[entry]
+
+        except (KeyError, TypeError):
+            raise ValueError(f"Entry '{entry}' not found in {self.path}")
+
     def foamDictionary_generate_dict(self, entry: Optional[str] = None):
         command = [
             "foamDictionary",
@@ -235,8 +463,15 @@ class OpenFoam_File:
     def values(self):
         return self.items().values()
 
-    @cached_property
+    @property
     def _keywords(self):
+        ## From the shared parse, so it follows changes made by other objects
+        if not self.use_foamDictionary:
+            return list(self._dictionary.keys())
+
+        return self._derive("_keywords", self._foamDictionary_keywords)
+
+    def _foamDictionary_keywords(self):
         command = [
             "foamDictionary",
             str(self.path),
@@ -249,41 +484,182 @@ class OpenFoam_File:
             return value.stdout.strip().split()
 
 
+class File_Edit:
+    """
+    Set and removed entries of an OpenFoam_File queued in memory.
+    See `OpenFoam_File.edit`.
+    """
+
+    _REMOVED = object()
+
+    def __init__(self, of_file: OpenFoam_File) -> None:
+        self.file = of_file
+        self._changes: list[tuple[str, Any]] = []
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.file.path}, {len(self._changes)} changes)"
+
+    def __setitem__(self, key: str, item: Any) -> None:
+        self._changes.append((key, item))
+
+    def __getitem__(self, key: str) -> Any:
+        for k, v in reversed(self._changes):
+            if k == key:
+                if v is self._REMOVED:
+                    raise ValueError(f"Entry '{key}' was removed")
+                return v
+
+        return self.file[key]
+
+    def __delitem__(self, key: str) -> None:
+        self._changes.append((key, self._REMOVED))
+
+    def commit(self) -> None:
+        """Apply all the queued changes with a single read and write of the file"""
+        if not self._changes:
+            return
+
+        buffer = self.file.path.read_bytes()
+
+        for key, value in self._changes:
+            try:
+                if value is self._REMOVED:
+                    buffer = remove_entry(buffer, key)
+                else:
+                    buffer = set_entry(buffer, key, value)
+
+            except KeyError:
+                raise ValueError(f"Entry '{key}' not found in {self.file.path}")
+
+        with atomic_open(self.file.path) as f:
+            f.write(buffer)
+
+        self._changes.clear()
+        self.file._clear_cache()
+
+
 class Dict_File(OpenFoam_File):
     """
     Class for OpenFOAM files that stores directories.
     """
 
-    def __init__(self, path: str | Path):
-        super().__init__(path)
+    def __init__(self, path: str | Path, use_foamDictionary: bool = False):
+        super().__init__(path, use_foamDictionary)
 
 
 class Field_File(OpenFoam_File):
-    def __init__(self, path: str | Path):
-        super().__init__(path)
+    def __init__(self, path: str | Path, use_foamDictionary: bool = False):
+        super().__init__(path, use_foamDictionary)
 
-    @cached_property
+    @property
     def dimensions(self):
-        value = self._foamDictionary_get_value("dimensions")
-        return Dimension.from_bracketed(value)
+        return self._derive(
+            "dimensions", lambda: Dimension.from_bracketed(self.generate_dict("dimensions"))
+        )
 
-    @cached_property
-    def boundaryField(self):
-        return self.foamDictionary_generate_dict("boundaryField")
+    @property
+    def boundaryField(self) -> OpenFoam_Dict:
+        """Patches as dictionaries, with nonuniform entries as NumPy arrays"""
+        return self._derive(
+            "boundaryField", lambda: _lists_to_numpy(self.generate_dict("boundaryField"))
+        )
 
-    @cached_property
-    def internalField(self) -> OpenFoam_Dict | str:
-        return self.foamDictionary_generate_dict("internalField")
+    @property
+    def internalField(self) -> np.ndarray | str:
+        """
+        Nonuniform fields are returned as NumPy arrays of shape (N,) for
+        scalars and (N, 3), (N, 6) or (N, 9) for vectors and tensors.
+        Uniform fields are returned as strings, e.g. `uniform 0`.
+        """
+        return self._derive(
+            "internalField", lambda: _lists_to_numpy(self.generate_dict("internalField"))
+        )
+
+    def write_internal_field(self, values: np.ndarray, precision: int = 12) -> None:
+        """
+        Write `values` as a nonuniform internalField. Arrays of shape (N,),
+        (N, 3), (N, 6) and (N, 9) are written as scalar, vector, symmTensor
+        and tensor lists, in the format (ascii/binary) of the file.
+        """
+        self._write_list("internalField", values, precision)
+
+    def write_boundary_field(
+        self,
+        patch: str,
+        values: np.ndarray,
+        entry: str = "value",
+        precision: int = 12,
+    ) -> None:
+        """
+        Write `values` as the nonuniform `entry` of `patch`. If the patch is
+        only matched by a pattern, e.g. "(top|bottom)", a new entry for it is
+        created from the pattern's settings.
+        """
+        patches = self.generate_dict("boundaryField")
+
+        if patch not in patches.keys():
+            settings = self.generate_dict(f"boundaryField.{patch}")
+            self[f"boundaryField.{patch}"] = {
+                k: v for k, v in settings.items() if k != entry and isinstance(v, str)
+            }
+
+        self._write_list(f"boundaryField.{patch}.{entry}", values, precision)
+
+    def _write_list(self, entry: str, values: np.ndarray, precision: int) -> None:
+        """Stream the list to a copy of the file, leaving the rest untouched"""
+        placeholder = "\0espuma\0"
+        header = self.generate_dict("FoamFile")
+
+        with open(self.path, "rb") as source:
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                start, end, text = splice_entry(buffer, entry, f"nonuniform {placeholder}")
+                head, tail = text.split(placeholder)
+
+                with atomic_open(self.path) as f:
+                    f.write(memoryview(buffer)[:start])
+                    f.write(head.encode())
+                    write_list(f, values, header, precision)
+                    f.write(tail.encode())
+                    f.write(memoryview(buffer)[end:])
+
+        self._clear_cache()
+
+
+def _parse_dictionary(path: Path) -> OpenFoam_Dict:
+    return parse_file(path, dict_type=OpenFoam_Dict)
+
+
+def _lists_to_numpy(value: Any) -> Any:
+    if isinstance(value, OpenFoam_List):
+        return value.to_numpy()
+
+    if isinstance(value, OpenFoam_Dict):
+        return OpenFoam_Dict((k, _lists_to_numpy(v)) for k, v in value.items())
+
+    return value
 
 
 class Directory:
+    """
+    Folder of a case. Its files are available as attributes, resolved on
+    first access from a listing of the folder made once.
+
+    Compressed files (`writeCompression on`, as `T.gz`) are not read.
+    Accessing them as `T` raises an AttributeError that says so.
+    """
+
+    ## Class of the file attributes, None for no file attributes
+    _file_class: Optional[type] = None
+
     def __init__(self, path: str | Path):
         path = Path(path).absolute()
 
-        if not path.exists():
+        try:
+            is_dir = stat.S_ISDIR(path.stat().st_mode)
+        except FileNotFoundError:
             raise FileNotFoundError(f"{path} does not exist")
 
-        if not path.is_dir():
+        if not is_dir:
             raise NotADirectoryError(f"{path} is not a directory")
 
         self.path = path
@@ -294,6 +670,32 @@ class Directory:
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self.path})"
 
+    def __getattr__(self, name: str) -> Any:
+        ## Only called when `name` is not set yet
+        if name.startswith("_") or self._file_class is None:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+        if not self._listing.get(name):
+            ## Written after the folder was listed
+            if not (self.path / name).is_file():
+                if (self.path / f"{name}.gz").is_file():
+                    raise AttributeError(
+                        f"{self.path / name} is compressed as {name}.gz, which espuma does not read. "
+                        "Set writeCompression off in controlDict, or decompress it"
+                    )
+
+                raise AttributeError(f"{self.path / name} not found")
+
+            self.refresh()
+
+        value = self._file_class(self.path / name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self) -> list[str]:
+        files = [name for name, is_file in self._listing.items() if is_file]
+        return sorted(set(super().__dir__()) | set(files if self._file_class else []))
+
     def _repr_html_(self):
         return (
             "<details open>\n"
@@ -307,9 +709,19 @@ class Directory:
             + "</details>\n"
         )
 
+    @cached_property
+    def _listing(self) -> dict[str, bool]:
+        """Names in the folder and whether they are files"""
+        with os.scandir(self.path) as entries:
+            return {e.name: e.is_file() for e in entries}
+
+    def refresh(self) -> None:
+        """List the folder again, e.g. after files were added by a utility"""
+        self.__dict__.pop("_listing", None)
+
     @property
     def _files(self):
-        return [f for f in self.path.iterdir() if f.is_file()]
+        return [self.path / name for name, is_file in self._listing.items() if is_file]
 
     @property
     def files(self):
@@ -317,51 +729,56 @@ class Directory:
 
 
 class Zero_Directory(Directory):
-    def __init__(self, path: str | Path):
-        super().__init__(path)
-
-        ## Add fields as properties
-        for f in self._files:
-            setattr(self, f.name, Field_File(f))
+    ## Fields as attributes
+    _file_class = Field_File
 
 
 class Constant_Directory(Directory):
-    def __init__(self, path: str | Path):
-        super().__init__(path)
-
-        ## Add files in directory as properties
-        for f in self._files:
-            setattr(self, f.name, Dict_File(f))
+    ## Files in directory as attributes
+    _file_class = Dict_File
 
 
 class System_Directory(Directory):
+    ## Files in directory as attributes
+    _file_class = Dict_File
+
     def __init__(self, path: str | Path):
         super().__init__(path)
 
-        ## Add file directories as properties
-        for f in self._files:
-            setattr(self, f.name, Dict_File(f))
-
-        assert getattr(self, "controlDict")
+        if not (self.path / "controlDict").is_file():
+            raise FileNotFoundError(f"{self.path / 'controlDict'} does not exist")
 
 
 class Case_Directory(Directory):
-    def __init__(self, path: str | Path) -> None:
-        super().__init__(path)
+    """
+    An OpenFOAM case. Opening it only checks that the folder exists: the
+    zero, constant and system folders are read on first access.
+    """
 
+    @cached_property
+    def zero(self) -> Zero_Directory:
         # Identify zero folder
-        n_valid_zero_folders = 0
-        for zero in self.path.glob(r"0*"):
-            if float(zero.name) == 0:
-                n_valid_zero_folders += 1
+        zeros = [
+            name
+            for name, is_file in self._listing.items()
+            if not is_file and is_time(name) and float(name) == 0
+        ]
+
+        if len(zeros) > 1:
+            raise FileExistsError("More than one zero folder was found.")
 
-                if n_valid_zero_folders > 1:
-                    raise FileExistsError("More than one zero folder was found.")
+        if not zeros:
+            raise FileNotFoundError(f"No zero folder found in {self.path}")
 
-                self.zero = Zero_Directory(zero)
+        return Zero_Directory(self.path / zeros[0])
 
-        self.constant = Constant_Directory(self.path / "constant")
-        self.system = System_Directory(self.path / "system")
+    @cached_property
+    def constant(self) -> Constant_Directory:
+        return Constant_Directory(self.path / "constant")
+
+    @cached_property
+    def system(self) -> System_Directory:
+        return System_Directory(self.path / "system")
 
     def _repr_html_(self):
         return (
@@ -376,6 +793,63 @@ class Case_Directory(Directory):
             "</details>\n"
         )
 
+    @cached_property
+    def mesh(self):
+        """Geometry of constant/polyMesh as NumPy arrays, see Poly_Mesh"""
+        from .mesh import Poly_Mesh
+
+        return Poly_Mesh(self.path / "constant/polyMesh")
+
+    @cached_property
+    def post_processing(self):
+        """Outputs of the function objects in postProcessing/, see Post_Processing"""
+        from .post_processing import Post_Processing
+
+        return Post_Processing(self.path)
+
+    def read_field(
+        self,
+        name: str,
+        times: Optional[float | list[float]] = None,
+        cells: Optional[slice | np.ndarray] = None,
+        max_workers: Optional[int] = None,
+    ) -> xr.DataArray:
+        """
+        Internal field `name` over time, read straight from the field files
+        without pyvista.
+
+        Parameters
+        ----------
+        name : str
+            Field, e.g. "T" or "U".
+        times : float or list of float, optional
+            Times to read. All the times the field was written at by default.
+        cells : slice or array of int, optional
+            Cells to keep. All the cells by default.
+        max_workers : int, optional
+            Threads used to read the times that are not cached yet.
+
+        Returns
+        -------
+        xr.DataArray
+            Values with dimensions (time, cell) for scalars, and (time, cell,
+            component) otherwise. The values are a memory map of a binary
+            cache in postProcessing/espuma_fields, kept per field, so reading
+            a field again only parses the times written since.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the field was not written at any time and is not cached.
+        ValueError
+            If it was not written at one of `times`.
+
+        >>> case.read_field("T", cells=slice(0, 10)).plot.line(x="time")
+        """
+        from .field_series import Field_Series
+
+        return Field_Series(self, name).read(times, cells, max_workers)
+
     def get_vtk_reader(self):
         # Dummy file for Paraview visualization avoiding foamToVTK
         # Source: https://openfoamwiki.net/index.php?title=Case_Name_.foam_File&oldid=18024
@@ -386,7 +860,40 @@ class Case_Directory(Directory):
 
     @property
     def list_times(self):
-        return sorted([float(t) for t in self._foamListTimes()])
+        """
+        Times written by the case, found without calling `foamListTimes`.
+        Scans are cached until the case directory changes.
+        """
+        times = {float(t) for t in self._time_folders()}
+
+        ## Times not reconstructed yet
+        if self.is_decomposed:
+            times.update(float(t) for t in self._time_folders(processor=True))
+
+        return sorted(times)
+
+    def _time_folders(self, processor: bool = False) -> list[str]:
+        """Names of the time folders, as `foamListTimes -withZero [-processor]`"""
+        return scan_times(self.path / "processor0" if processor else self.path)
+
+    def watch_times(self) -> Time_Watcher:
+        """
+        Watch for new time folders, see `espuma.time_folders.Time_Watcher`.
+
+        >>> with case.watch_times() as watcher:
+        ...     for _, time in watcher:
+        ...         if time >= end_time:
+        ...             break
+        """
+        return Time_Watcher([self.path])
+
+    @property
+    def is_decomposed(self) -> bool:
+        return (self.path / "processor0").is_dir()
+
+    @property
+    def processors(self) -> list[Path]:
+        return sorted(self.path.glob("processor[0-9]*"), key=lambda p: int(p.name[9:]))
 
     def is_finished(self):
         if self.system.controlDict["stopAt"] != "endTime":
@@ -402,6 +909,10 @@ class Case_Directory(Directory):
     def _blockMesh(self, verbose: bool = False):
         command = ["blockMesh"]
 
+        ## Meshes hardlinked by older versions would be overwritten in the template too
+        _unlink_shared(self.path / "constant/polyMesh")
+        self.__dict__.pop("mesh", None)
+
         value = run(command, cwd=self.path)
 
         if value.returncode != 0:
@@ -425,20 +936,282 @@ class Case_Directory(Directory):
         if verbose:
             print("setFields finished successfully!")
 
-    def _runCase(self, verbose: bool = False):
+    def _runCase(
+        self,
+        verbose: bool = False,
+        log_file: Optional[str | Path] = None,
+        callbacks: tuple[Callable[[Time_Step], Optional[bool]], ...] = (),
+        n_processors: int = 1,
+        method: str = "scotch",
+        reconstruct: Optional[str] = "all",
+    ):
+        """
+        Run the application of controlDict.
+
+        With `n_processors` > 1, the case is decomposed with `method`, run
+        with `mpirun -np n_processors <application> -parallel`, and then
+        reconstructed: "all" times, only the "latest" one, or None to keep
+        the results in the processor* folders, where `list_times` and
+        `export_to_xarray` can still read them.
+        """
         application = self.system.controlDict["application"]
-        command = [application]
 
-        value = run_solver(command, cwd=self.path)
+        if n_processors > 1:
+            self.decompose(n_processors, method)
 
-        if value.returncode != 0:
-            raise OSError(" ".join(command) + "\n\n" + value.stderr.strip())
+        self.solve(log_file=log_file, callbacks=callbacks, n_processors=n_processors)
+
+        if n_processors > 1 and reconstruct is not None:
+            self._reconstructPar(latest_time=reconstruct == "latest")
 
         if verbose:
             print(f"{application} finished successfully!")
 
-    def _foamListTimes(self):
-        command = ["foamListTimes", "-withZero"]
+    def decompose(
+        self,
+        n_processors: int,
+        method: str = "scotch",
+        coeffs: Optional[dict] = None,
+        verbose: bool = False,
+    ):
+        """
+        Write system/decomposeParDict and run decomposePar.
+
+        Parameters
+        ----------
+        n_processors : int
+            Number of subdomains.
+        method : str
+            Decomposition method, such as scotch, simple or hierarchical.
+        coeffs : dict, optional
+            Written as `<method>Coeffs`, for example {"n": "(2 2 1)"} for
+            the simple method.
+
+        """
+        self._write_decomposeParDict(n_processors, method, coeffs)
+        self._decomposePar(verbose)
+
+    def _write_decomposeParDict(self, n_processors: int, method: str, coeffs: Optional[dict]):
+        entries = {"numberOfSubdomains": n_processors, "method": method}
+
+        if coeffs:
+            entries[f"{method}Coeffs"] = coeffs
+
+        decompose_dict = self.system.path / "decomposeParDict"
+
+        with atomic_open(decompose_dict) as f:
+            header = {"location": '"system"', "object": "decomposeParDict"}
+            f.write(format_file(entries, header).encode())
+
+        self.system.decomposeParDict = Dict_File(decompose_dict)
+
+    def _decomposePar(self, verbose: bool = False):
+        command = ["decomposePar", "-force"]
+
+        value = run(command, cwd=self.path)
+
+        if value.returncode != 0:
+            raise OSError(
+                " ".join(command) + "\n\n" + value.stdout.strip() + "\n\n" + value.stderr.strip()
+            )
+
+        if verbose:
+            print("decomposePar finished successfully!")
+
+    def _reconstructPar(self, latest_time: bool = False, verbose: bool = False):
+        command = ["reconstructPar"] + (["-latestTime"] if latest_time else [])
+
+        value = run(command, cwd=self.path)
+
+        if value.returncode != 0:
+            raise OSError(
+                " ".join(command) + "\n\n" + value.stdout.strip() + "\n\n" + value.stderr.strip()
+            )
+
+        if verbose:
+            print(" ".join(command) + " finished successfully!")
+
+    def _solver_command(self, n_processors: int = 1) -> list[str]:
+        application = self.system.controlDict["application"]
+
+        if n_processors > 1:
+            return ["mpirun", "-np", str(n_processors), application, "-parallel"]
+
+        return [application]
+
+    def solve(
+        self,
+        log_file: Optional[str | Path] = None,
+        callbacks: tuple[Callable[[Time_Step], Optional[bool]], ...] = (),
+        n_processors: int = 1,
+    ) -> Solver_Log:
+        """
+        Run the application of controlDict until it exits.
+
+        Parameters
+        ----------
+        log_file : str | Path, optional
+            Copy of the solver output, relative to the case.
+        callbacks : list of callables
+            Called with every `Time_Step` as the solver reports it. The
+            solver is killed if any of them returns False.
+        n_processors : int
+            If > 1, run with mpirun on a case that is already decomposed.
+
+        Returns
+        -------
+        Solver_Log
+            Residuals, Courant numbers and execution time of every step.
+            `Solver_Log.to_xarray` gives them as a time series.
+
+        """
+        with self.start_solver(log_file, callbacks, n_processors) as solver:
+            return solver.wait()
+
+    def start_solver(
+        self,
+        log_file: Optional[str | Path] = None,
+        callbacks: tuple[Callable[[Time_Step], Optional[bool]], ...] = (),
+        n_processors: int = 1,
+    ) -> Solver_Run:
+        """Start the application in the background. See `Solver_Run`"""
+        return Solver_Run(self._solver_command(n_processors), self.path, log_file, callbacks)
+
+    ### Async versions: ###############################
+    ## Processes are run through espuma.async_process, limited by a
+    ## semaphore shared by all the cases on the event loop. Cancelling the
+    ## task terminates the process.
+
+    async def _blockMesh_async(self, verbose: bool = False):
+        _unlink_shared(self.path / "constant/polyMesh")
+        self.__dict__.pop("mesh", None)
+        await run_process_async(["blockMesh"], self.path)
+
+        if verbose:
+            print("blockMesh finished successfully!")
+
+    async def _setFields_async(self, verbose: bool = False):
+        await run_process_async(["setFields"], self.path)
+
+        if verbose:
+            print("setFields finished successfully!")
+
+    async def _runCase_async(
+        self,
+        verbose: bool = False,
+        log_file: Optional[str | Path] = None,
+        callbacks: tuple[Callable[[Time_Step], Optional[bool]], ...] = (),
+        n_processors: int = 1,
+        method: str = "scotch",
+        reconstruct: Optional[str] = "all",
+    ):
+        """Async version of `_runCase`"""
+        if n_processors > 1:
+            await self.decompose_async(n_processors, method)
+
+        await self.solve_async(log_file, callbacks, n_processors)
+
+        if n_processors > 1 and reconstruct is not None:
+            await self._reconstructPar_async(latest_time=reconstruct == "latest")
+
+        if verbose:
+            print(f"{self.system.controlDict['application']} finished successfully!")
+
+    async def decompose_async(
+        self,
+        n_processors: int,
+        method: str = "scotch",
+        coeffs: Optional[dict] = None,
+        verbose: bool = False,
+    ):
+        """Async version of `decompose`"""
+        self._write_decomposeParDict(n_processors, method, coeffs)
+        await run_process_async(["decomposePar", "-force"], self.path)
+
+        if verbose:
+            print("decomposePar finished successfully!")
+
+    async def _reconstructPar_async(self, latest_time: bool = False, verbose: bool = False):
+        command = ["reconstructPar"] + (["-latestTime"] if latest_time else [])
+        await run_process_async(command, self.path)
+
+        if verbose:
+            print(" ".join(command) + " finished successfully!")
+
+    async def solve_async(
+        self,
+        log_file: Optional[str | Path] = None,
+        callbacks: tuple[Callable[[Time_Step], Optional[bool]], ...] = (),
+        n_processors: int = 1,
+    ) -> Solver_Log:
+        """Async version of `solve`"""
+        command = self._solver_command(n_processors)
+        log = Solver_Log()
+
+        with open(self.path / log_file, "w") if log_file else nullcontext() as f:
+
+            def on_line(line: str) -> Optional[bool]:
+                if f is not None:
+                    f.write(line)
+
+                step = log.feed(line)
+
+                if step is not None and any(callback(step) is False for callback in callbacks):
+                    return False
+
+            await run_process_async(command, self.path, on_line)
+
+        ## The last step ends with the output, as in Solver_Run
+        if (step := log.flush()) is not None:
+            for callback in callbacks:
+                if callback(step) is False:
+                    break
+
+        return log
+
+    async def _foamListTimes_async(self) -> list[str]:
+        stdout = await run_process_async(["foamListTimes", "-withZero"], self.path, capture=True)
+        return stdout.strip().splitlines()
+
+    async def export_to_xarray_async(self, **export_kwargs) -> xr.Dataset:
+        """`export_to_xarray` on a thread, within the concurrency limit"""
+        async with concurrency_limit():
+            return await asyncio.to_thread(self.export_to_xarray, **export_kwargs)
+
+    async def run_async(
+        self,
+        steps: tuple[str, ...] = ("blockMesh", "run"),
+        log_file: Optional[str | Path] = None,
+        callbacks: tuple[Callable[[Time_Step], Optional[bool]], ...] = (),
+        n_processors: int = 1,
+        **export_kwargs,
+    ) -> Optional[xr.Dataset]:
+        """
+        Mesh, initialize, solve and export the case, in the order given
+        by `steps`, which default to those of `Sweep`. Returns the exported
+        dataset if "export" is a step. With `n_processors` > 1, the case
+        is run in parallel as in `_runCase`.
+        """
+        unknown = [step for step in steps if step not in ("blockMesh", "setFields", "run", "export")]
+        if unknown:
+            raise ValueError(f"Unknown steps {unknown}")
+
+        exported = None
+
+        for step in steps:
+            if step == "blockMesh":
+                await self._blockMesh_async()
+            elif step == "setFields":
+                await self._setFields_async()
+            elif step == "run":
+                await self._runCase_async(log_file=log_file, callbacks=callbacks, n_processors=n_processors)
+            else:
+                exported = await self.export_to_xarray_async(**export_kwargs)
+
+        return exported
+
+    def _foamListTimes(self, processor: bool = False):
+        command = ["foamListTimes", "-withZero"] + (["-processor"] if processor else [])
         value = run(command, cwd=self.path)
 
         if value.returncode != 0:
@@ -456,83 +1229,192 @@ class Case_Directory(Directory):
         if verbose:
             print(" ".join(command) + " finished successfully!")
 
-    def export_to_xarray(self, ignore_initial_time: bool = True):
+    def export_to_xarray(
+        self,
+        ignore_initial_time: bool = True,
+        incremental: bool = False,
+        max_workers: int = 1,
+        method: str = "line",
+        decomposed: Optional[bool] = None,
+        sampling: Optional[dict[str, Sample]] = None,
+    ) -> xr.Dataset | dict[str, xr.Dataset]:
         """
         Export 1D result as a single xarray dataset.
-        Requires xarray and pyvista.
+
+        Parameters
+        ----------
+        ignore_initial_time : bool
+            Skip the first time folder.
+        incremental : bool
+            Read only the times written after the cached NetCDF file was
+            made and append them to it along `time`.
+        max_workers : int
+            If > 1, the times are split in contiguous shards, each read
+            by its own process. The result is the same.
+        method : str
+            "line" samples a vertical line over the mesh bounds with
+            pyvista. "cells" reads the cell values of single-column meshes
+            straight from the field files, ordered by depth, without
+            interpolation nor pyvista.
+        decomposed : bool, optional
+            Read the results from the processor* folders of a parallel run
+            instead of the reconstructed case. By default, they are read if
+            they hold times that were not reconstructed.
+        sampling : dict[str, Line | Points | Plane], optional
+            Geometries from `espuma.sampling` to sample instead of the
+            vertical line, all in the same pass over the times. Only with
+            method "line".
+
+        Returns
+        -------
+        xr.Dataset
+            Variables with dimensions (depth, time), cached in
+            postProcessing/espuma_as_netcdf. Time slices are written to the
+            file as they are read, compressed and chunked along time, so the
+            full array is never held in memory. The dataset is only loaded
+            lazily, one dask chunk per chunk on disk, if dask is installed.
+            Without dask, each variable is read whole the first time its
+            values are used.
+        dict[str, xr.Dataset]
+            With `sampling`, a dataset for each geometry, cached in
+            postProcessing/espuma_as_netcdf/samples/<name>.nc, with variables
+            along (distance or point, time) and x, y, z coordinates.
+
+        Raises
+        ------
+        ValueError
+            If there are no time steps to export and nothing was exported
+            before.
+
+        Notes
+        -----
+        The points are located in the mesh once, assuming it does not move,
+        and the point data of every time is interpolated to them with the
+        same weights as `sample_over_line`, kept as a sparse matrix in
+        postProcessing/espuma_sampling for later exports.
+
         """
 
+        if method not in ("line", "cells"):
+            raise ValueError(f"method must be 'line' or 'cells'. Got {method}")
+
+        if sampling is not None and method != "line":
+            raise ValueError(f"sampling needs method 'line'. Got {method}")
+
         path_to_nc = self.path / "postProcessing/espuma_as_netcdf"
-        path_to_nc.mkdir(exist_ok=True)
-        nc_file = path_to_nc / "results.nc"
 
-        if nc_file.exists():
-            return xr.open_dataset(nc_file, engine="netcdf4")
+        if sampling is None:
+            nc_files = {method: path_to_nc / ("results.nc" if method == "line" else "cells.nc")}
+            geometries = {}
+        else:
+            nc_files = {name: path_to_nc / "samples" / f"{name}.nc" for name in sampling}
+            geometries = {name: repr(geometry) for name, geometry in sampling.items()}
 
-        ## Read each time folder in Foam results
-        reader = self.get_vtk_reader()
-        stacked: dict[str, pv.PolyData] = {}
+        nc_files[next(iter(nc_files))].parent.mkdir(parents=True, exist_ok=True)
+
+        for name, nc_file in nc_files.items():
+            _drop_changed_geometry(nc_file, geometries.get(name))
+
+        def opened():
+            if sampling is None:
+                return _open_netcdf(nc_files[method])
+            return {name: _open_netcdf(nc_file) for name, nc_file in nc_files.items()}
+
+        if all(nc_file.exists() for nc_file in nc_files.values()) and not incremental:
+            return opened()
 
+        ## The root may have no time folder at all, e.g. 0 only in processor*/
+        if decomposed is None:
+            decomposed = self.is_decomposed and max(self.list_times, default=-inf) > max(
+                (float(t) for t in self._time_folders()), default=-inf
+            )
+
+        ## Read each time folder in Foam results
         ts = slice(1, None) if ignore_initial_time else slice(None)
 
-        for t in reader.time_values[ts]:
-            reader.set_active_time_value(t)
-            mesh = reader.read()  # <- Read the data
-            internalMesh = mesh["internalMesh"]
+        if method == "line":
+            reader = self.get_vtk_reader()
+            reader.case_type = "decomposed" if decomposed else "reconstructed"
+            times = reader.time_values[ts]
+        else:
+            folders = self._time_folders(processor=decomposed)[ts]
+            times = [float(t) for t in folders]
+
+        ## Checked before the mesh is read, so there is nothing to do when up to date
+        new_times = _new_times(nc_files.values(), times)
+
+        if not new_times:
+            if not all(nc_file.exists() for nc_file in nc_files.values()):
+                raise ValueError(f"No time steps to export in {self.path}")
 
-            (xi, yi, zi, xf, yf, zf) = internalMesh.bounds
+            return opened()
 
-            initial_point = [xi, yi, zi]
-            end_point = [xi, yi, zf]
+        if method == "line":
+            writers, located = {}, {}
+            mesh = _read_geometry(reader)
+            cache_dir = self.path / "postProcessing/espuma_sampling"
 
-            line_probe = internalMesh.sample_over_line(initial_point, end_point)
-            stacked[f"{t:.2f}"] = line_probe
+            if sampling is None:
+                (xi, yi, zi, xf, yf, zf) = mesh.bounds
+                line = Line((xi, yi, zi), (xi, yi, zf), n_points=mesh.n_cells + 1)
+                points = line.points(mesh.bounds)
+                depth = line.coordinate(points)
 
-        ## Flatten vector data to separate 1D arrays
-        expanded: dict[str, dict[str, np.ndarray]] = {}
+                located[method] = (Interpolation.cached(mesh, points, cache_dir), {"Distance": depth})
+                writers[method] = _Netcdf_Writer(nc_files[method], "depth", {"depth": depth})
 
-        for t, x in stacked.items():
-            expanded[t] = {}
+            for name, geometry in (sampling or {}).items():
+                points = geometry.points(mesh.bounds)
+                dim = geometry.dimension
+                coords = {dim: geometry.coordinate(points), "x": points[:, 0], "y": points[:, 1], "z": points[:, 2]}
 
-            for name in x.array_names:
-                if "vtk" not in name:
-                    if len(x[name].shape) > 1:
-                        for j in range(x[name].shape[1]):
-                            expanded[t][name + "_" + str(j)] = x[name][:, j]
-                    else:
-                        expanded[t][name] = x[name]
+                located[name] = (Interpolation.cached(mesh, points, cache_dir), {})
+                writers[name] = _Netcdf_Writer(nc_files[name], dim, coords, {"geometry": geometries[name]})
 
-        ## Convert to bare np and stack results as (time, depth)
-        to_stack = []
+            sample = partial(_sample_times, reader.path, located, decomposed=decomposed)
 
-        for x in expanded.values():
-            to_stack.append(np.stack([v for v in x.values()], axis=-1))
+        else:
+            order, depth = self._column()
+            addressing = self._cell_addressing() if decomposed else None
+            sample = partial(
+                _read_cells, self.path, dict(zip(times, folders)), order, depth, addressing=addressing
+            )
+            writers = {method: _Netcdf_Writer(nc_files[method])}
+
+        times = new_times
+        slices = _stream_times(sample, times, max_workers)
 
-        complete = np.stack(to_stack, axis=-1)
+        if method == "cells":
+            slices = ((t, {method: variables}) for t, variables in slices)
 
-        # Metadata
-        times = [float(t) for t in expanded.keys()]
-        for x in expanded.values():
-            variables = x.keys()
-            distance = x["Distance"]
-            break
+        _write_netcdfs(writers, slices)
 
-        ## Assemble xarrays
-        xars = {}
+        return opened()
 
-        for i, variable in enumerate(variables):
-            a = complete[:, i, :]
-            xars[variable] = xr.DataArray(
-                a,
-                dims=("depth", "time"),
-                coords={"depth": distance, "time": times},
+    def _cell_addressing(self) -> dict[str, np.ndarray]:
+        """Cells of the whole mesh held by each processor"""
+        return {
+            processor.name: np.asarray(
+                parse_list_file(processor / "constant/polyMesh/cellProcAddressing", "label")
             )
+            for processor in self.processors
+        }
+
+    def _column(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Order of the cells of a single-column mesh along z, and their depth
+        measured from the lowest boundary face.
+        """
+        centres = self.mesh.cell_centres
 
-        ## Combine into single dataset and save
-        xdset = xr.Dataset(xars)
-        xdset.to_netcdf(nc_file)
+        if not np.allclose(centres[:, :2], centres[0, :2]):
+            raise ValueError(f"{self.path.name} mesh is not a single column along z")
 
-        return xdset
+        boundary_faces = self.mesh.face_centres[self.mesh.n_internal_faces :]
+        bottom = boundary_faces[:, 2].min(initial=centres[:, 2].min())
+
+        order = np.argsort(centres[:, 2], kind="stable")
+        return order, centres[order, 2] - bottom
 
     @classmethod
     def clone_from_template(
@@ -540,7 +1422,14 @@ class Case_Directory(Directory):
         template: Case_Directory,
         path: str | Path,
         overwrite: bool = False,
+        link_mesh: bool = True,
     ):
+        """
+        Copy the zero, constant and system folders of `template` to `path`.
+        With `link_mesh`, large folders (see `LINKED_FOLDERS`) are
+        reflinked instead of copied where the filesystem supports it.
+        `triSurface`, which is only read, can also be hardlinked.
+        """
         if not isinstance(template, Case_Directory):
             raise TypeError(f"{template} must be a espuma.Case_Directory object")
 
@@ -556,10 +1445,39 @@ class Case_Directory(Directory):
             elif path.is_file():
                 path.unlink()
 
-        cls._foamCloneCase(template.path, path)
+        cls._clone_case(template.path, path, link_mesh=link_mesh)
 
         return Case_Directory(path)
 
+    @classmethod
+    def _clone_case(
+        cls,
+        source_case: str | Path,
+        target_case: str | Path,
+        link_mesh: bool = True,
+    ):
+        source_case, target_case = Path(source_case), Path(target_case)
+        target_case.mkdir(parents=True)
+
+        for zero in _zero_folders(source_case):
+            shutil.copytree(zero, target_case / zero.name)
+
+        shutil.copytree(source_case / "system", target_case / "system")
+        shutil.copytree(
+            source_case / "constant",
+            target_case / "constant",
+            ignore=shutil.ignore_patterns(*LINKED_FOLDERS) if link_mesh else None,
+        )
+
+        if link_mesh:
+            for folder, hardlink in LINKED_FOLDERS.items():
+                if (source_case / "constant" / folder).is_dir():
+                    shutil.copytree(
+                        source_case / "constant" / folder,
+                        target_case / "constant" / folder,
+                        copy_function=partial(_link_or_copy, hardlink=hardlink),
+                    )
+
     @classmethod
     def _foamCloneCase(
         cls,
@@ -567,7 +1485,7 @@ class Case_Directory(Directory):
         target_case: str | Path,
         verbose: bool = False,
     ):
-        command = ["foamCloneCase", f'"{str(source_case)}"', '"{str(target_case)}"']
+        command = ["foamCloneCase", str(source_case), str(target_case)]
         value = run(command)
 
         if value.returncode != 0:
@@ -576,6 +1494,403 @@ class Case_Directory(Directory):
         if verbose:
             print(" ".join(command) + " finished successfully!")
 
+    @classmethod
+    async def _foamCloneCase_async(
+        cls,
+        source_case: str | Path,
+        target_case: str | Path,
+        verbose: bool = False,
+    ):
+        command = ["foamCloneCase", str(source_case), str(target_case)]
+        await run_process_async(command, Path.cwd())
+
+        if verbose:
+            print(" ".join(command) + " finished successfully!")
+
+
+def _read_geometry(reader: POpenFOAMReader) -> pv.UnstructuredGrid:
+    """Internal mesh at the first time, without reading any field"""
+    reader.disable_all_cell_arrays()
+    reader.disable_all_point_arrays()
+    reader.set_active_time_value(reader.time_values[0])
+
+    try:
+        return reader.read()["internalMesh"]
+    finally:
+        reader.enable_all_cell_arrays()
+        reader.enable_all_point_arrays()
+
+
+def _sample_times(
+    foam_file: Path,
+    located: dict[str, tuple[Interpolation, dict[str, np.ndarray]]],
+    times: list[float],
+    decomposed: bool = False,
+) -> dict[float, dict[str, dict[str, np.ndarray]]]:
+    """
+    Interpolate the point data at each time to every geometry, with the
+    static variables given for each. Also runs in worker processes.
+    """
+    reader = POpenFOAMReader(foam_file)
+    reader.case_type = "decomposed" if decomposed else "reconstructed"
+    result = {}
+
+    for t in times:
+        reader.set_active_time_value(t)
+        mesh = reader.read()["internalMesh"]  # <- Read the data
+
+        result[t] = {
+            name: {**static, **interpolation(mesh)}
+            for name, (interpolation, static) in located.items()
+        }
+
+    return result
+
+
+def _read_cells(
+    case_path: Path,
+    folders: dict[float, str],
+    order: np.ndarray,
+    depth: np.ndarray,
+    times: list[float],
+    addressing: Optional[dict[str, np.ndarray]] = None,
+) -> dict[float, dict[str, np.ndarray]]:
+    """
+    Read the internal field of every volume field written at each time,
+    ordered as `order`. With the `addressing` of a decomposed case, the
+    fields are gathered from the processor folders. Compressed (`.gz`)
+    fields are not read, with a warning. Also runs in worker processes.
+    """
+    result = {}
+    first = case_path / next(iter(addressing)) if addressing else case_path
+
+    for t in times:
+        flat = {"Distance": depth}
+
+        for f in sorted((first / folders[t]).iterdir()):
+            if f.suffix == ".gz":
+                warnings.warn(f"Skipped {f}: compressed fields are not read. Set writeCompression off")
+
+            if not f.is_file() or f.suffix in (".gz", ".orig"):
+                continue
+
+            field = Field_File(f)
+            field_class = field.generate_dict("FoamFile").get("class", "")
+
+            if not (field_class.startswith("vol") and field_class.endswith("Field")):
+                continue
+
+            if addressing:
+                values = _gather_cells(case_path, f"{folders[t]}/{f.name}", addressing, len(order))
+            else:
+                values = _cell_values(field.internalField, len(order))
+
+            values = values[order]
+
+            if values.ndim > 1:
+                for j in range(values.shape[1]):
+                    flat[f.name + "_" + str(j)] = values[:, j]
+            else:
+                flat[f.name] = values
+
+        result[t] = flat
+
+    return result
+
+
+def _gather_cells(
+    case_path: Path,
+    field: str,
+    addressing: dict[str, np.ndarray],
+    n_cells: int,
+) -> np.ndarray:
+    """Internal field of the whole mesh from the pieces in each processor folder"""
+    values = None
+
+    for processor, cells in addressing.items():
+        local = _cell_values(Field_File(case_path / processor / field).internalField, len(cells))
+
+        if values is None:
+            values = np.empty((n_cells, *local.shape[1:]), dtype=local.dtype)
+
+        values[cells] = local
+
+    return values
+
+
+def _cell_values(internal_field: np.ndarray | str, n_cells: int) -> np.ndarray:
+    """Expand `uniform` fields to one value per cell"""
+    if not isinstance(internal_field, str):
+        return np.asarray(internal_field)
+
+    value = internal_field.removeprefix("uniform").replace("(", " ").replace(")", " ")
+    value = np.fromstring(value, sep=" ")
+
+    if value.size == 1:
+        return np.full(n_cells, value[0])
+
+    return np.tile(value, (n_cells, 1))
+
+
+def _exported_times(nc_file: Path) -> np.ndarray:
+    with xr.open_dataset(nc_file, engine="netcdf4") as exported:
+        return exported["time"].values
+
+
+## Datasets returned by `_open_netcdf`, closed before their file is written
+_opened: dict[str, list[weakref.ref]] = {}
+
+
+def _release_netcdf(nc_file: Path) -> None:
+    """
+    Close the datasets opened from `nc_file` by `_open_netcdf`, so it can
+    be opened for writing. They reopen the file on their next read.
+    """
+    for ref in _opened.pop(str(Path(nc_file).absolute()), []):
+        dataset = ref()
+
+        if dataset is not None:
+            dataset.close()
+
+
+## Time slices per chunk of the exported NetCDF files, and depths per chunk
+CHUNK_TIMES = 32
+CHUNK_DEPTHS = 1024
+
+
+def _stream_times(sample, times: list[float], max_workers: int = 1):
+    """
+    Yield (time, variables) in order, reading `CHUNK_TIMES` times at a
+    time, so only a few slices are in memory at once.
+    """
+    size = CHUNK_TIMES
+
+    if max_workers > 1:  ## Smaller shards so every worker gets some
+        size = max(1, min(size, -(-len(times) // max_workers)))
+
+    shards = [times[i : i + size] for i in range(0, len(times), size)]
+
+    if max_workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(shards))) as pool:
+            for result in pool.map(sample, shards):
+                yield from result.items()
+
+    else:
+        for shard in shards:
+            yield from sample(shard).items()
+
+
+def _open_netcdf(nc_file: Path) -> xr.Dataset:
+    """
+    Open with one dask chunk per chunk on disk if dask is available, so it
+    is loaded lazily. Otherwise, variables are read whole when first used.
+    """
+    try:
+        import dask  # noqa: F401
+
+    except ImportError:
+        dataset = xr.open_dataset(nc_file, engine="netcdf4")
+
+    else:
+        dataset = xr.open_dataset(nc_file, engine="netcdf4", chunks={})
+
+    refs = _opened.setdefault(str(Path(nc_file).absolute()), [])
+    refs[:] = [ref for ref in refs if ref() is not None]
+    refs.append(weakref.ref(dataset))
+
+    return dataset
+
+
+def _create_netcdf(
+    nc_file: Path,
+    dim: str,
+    coords: dict[str, np.ndarray],
+    variables: dict[str, np.ndarray],
+    attrs: dict[str, str],
+) -> None:
+    """
+    Empty file with an unlimited `time`, the static `coords` along `dim`
+    and zlib compressed (dim, time) chunks
+    """
+    size = len(coords[dim])
+
+    with netCDF4.Dataset(nc_file, "w") as nc:
+        nc.setncatts(attrs)
+        nc.createDimension(dim, size)
+        nc.createDimension("time", None)
+
+        for name, values in coords.items():
+            nc.createVariable(name, values.dtype, (dim,))[:] = values
+
+        nc.createVariable("time", "f8", ("time",), chunksizes=(CHUNK_TIMES,))
+
+        for variable, profile in variables.items():
+            nc.createVariable(
+                variable,
+                profile.dtype,
+                (dim, "time"),
+                zlib=True,
+                complevel=4,
+                shuffle=True,
+                chunksizes=(min(size, CHUNK_DEPTHS), CHUNK_TIMES),
+            )
+
+            ## Static coordinates other than `dim` are only picked by xarray if named
+            if len(coords) > 1:
+                nc[variable].coordinates = " ".join(name for name in coords if name != dim)
+
+
+class _Netcdf_Writer:
+    """
+    Appends time slices to `nc_file` along `time`, creating it on the first
+    one. Times already in the file are skipped. Slices are flushed every
+    `CHUNK_TIMES`, matching the chunks on disk.
+
+    Without `coords`, the file is along the `Distance` of the first slice.
+    """
+
+    def __init__(
+        self,
+        nc_file: Path,
+        dim: str = "depth",
+        coords: Optional[dict[str, np.ndarray]] = None,
+        attrs: Optional[dict[str, str]] = None,
+    ) -> None:
+        self.nc_file = nc_file
+        self.dim = dim
+        self.coords = coords
+        self.attrs = attrs or {}
+        self.exported = _exported_times(nc_file) if nc_file.exists() else np.empty(0)
+        self._nc = None
+        self._batch = []
+
+    def has(self, t: float) -> bool:
+        return bool(np.isclose(t, self.exported).any())
+
+    def add(self, t: float, variables: dict[str, np.ndarray]) -> None:
+        if self.has(t):
+            return
+
+        if self._nc is None:
+            coords = self.coords or {self.dim: np.asarray(variables["Distance"])}
+            self._nc = _append_to_netcdf(self.nc_file, self.dim, coords, variables, self.attrs)
+
+        self._batch.append((t, variables))
+
+        if len(self._batch) == CHUNK_TIMES:
+            self.flush()
+
+    def flush(self) -> None:
+        nc, batch = self._nc, self._batch
+        n = nc.dimensions["time"].size
+        nc["time"][n:] = [t for t, _ in batch]
+
+        for variable in nc.variables:
+            if nc[variable].dimensions == (self.dim, "time"):
+                nc[variable][:, n:] = np.stack([x[variable] for _, x in batch], axis=-1)
+
+        batch.clear()
+
+    def close(self) -> None:
+        if self._nc is None:
+            return
+
+        try:
+            if self._batch:
+                self.flush()
+        finally:
+            self._nc.close()
+            self._nc = None
+
+
+def _new_times(nc_files: Iterable[Path], times: Iterable[float]) -> list[float]:
+    """`times` not yet exported to every one of `nc_files`"""
+    exported = [_exported_times(nc_file) if nc_file.exists() else np.empty(0) for nc_file in nc_files]
+    return [t for t in times if not all(np.isclose(t, e).any() for e in exported)]
+
+
+def _write_netcdfs(writers: dict[str, _Netcdf_Writer], slices) -> None:
+    """Write the (time, {name: variables}) pairs of `slices` to the writer of each name"""
+    try:
+        for t, samples in slices:
+            for name, variables in samples.items():
+                writers[name].add(t, variables)
+
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def _write_netcdf(nc_file: Path, slices) -> None:
+    """Write the (time, variables) pairs of `slices` to `nc_file`, along depth"""
+    _write_netcdfs({"": _Netcdf_Writer(nc_file)}, ((t, {"": variables}) for t, variables in slices))
+
+
+## Arrays of the line source that older versions exported as variables
+_LINE_ARTIFACTS = "Texture Coordinates"
+
+
+def _append_to_netcdf(
+    nc_file: Path,
+    dim: str,
+    coords: dict[str, np.ndarray],
+    variables: dict,
+    attrs: dict[str, str],
+) -> netCDF4.Dataset:
+    """Open `nc_file` for appending, creating it if needed"""
+    if nc_file.exists():
+        _release_netcdf(nc_file)
+
+        with netCDF4.Dataset(nc_file) as nc:
+            profiles = [v for v in nc.variables if nc[v].dimensions == (dim, "time")]
+            legacy = (
+                not nc.dimensions["time"].isunlimited()
+                or not all(nc[v].filters()["zlib"] for v in profiles)
+                or any(v.startswith(_LINE_ARTIFACTS) for v in profiles)
+            )
+
+        if legacy:  ## Made by older versions, rewrite it once
+            with xr.open_dataset(nc_file, engine="netcdf4") as old:
+                old = old.load()
+
+            nc_file.unlink()
+            _write_netcdf(
+                nc_file,
+                (
+                    (t, {v: old[v].values[:, i] for v in old.data_vars if not v.startswith(_LINE_ARTIFACTS)})
+                    for i, t in enumerate(old["time"].values)
+                ),
+            )
+
+    else:
+        _create_netcdf(nc_file, dim, coords, variables, attrs)
+
+    nc = netCDF4.Dataset(nc_file, "a")
+    profiles = {v for v in nc.variables if nc[v].dimensions == (dim, "time")}
+
+    if (
+        profiles != set(variables)
+        or nc[dim].shape != coords[dim].shape
+        or not np.allclose(nc[dim][:], coords[dim])
+    ):
+        nc.close()
+        raise ValueError(f"New times do not match the data in {nc_file}")
+
+    return nc
+
+
+def _drop_changed_geometry(nc_file: Path, geometry: Optional[str]) -> None:
+    """Delete `nc_file` if it was sampled over another geometry than `geometry`"""
+    if geometry is None or not nc_file.exists():
+        return
+
+    with netCDF4.Dataset(nc_file) as nc:
+        changed = getattr(nc, "geometry", None) != geometry
+
+    if changed:
+        _release_netcdf(nc_file)
+        nc_file.unlink()
+
 
 def main():
     pass
@@ -1,13 +1,22 @@
+import json
+import re
+
 import xarray as xr
 import numpy as np
+from pathlib import Path
 from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional
 
-import csv
 from itertools import chain
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
 
 from . import Case_Directory
-from .base import Dict_File
+from .base import Dict_File, atomic_open, read_memmap
+from .set_formats import get_reader
+
+## Bumped when the layout of the cache changes, so older caches are rebuilt
+CACHE_VERSION = 1
 
 
 @dataclass(slots=True, frozen=True)
@@ -28,25 +37,40 @@ class Boundary_Probe:
         if parser_kwargs is None:
             parser_kwargs = {}
 
-        self._boundaryProbes_to_txt(of_case, **parser_kwargs)
+        self.path = of_case.path / "postProcessing/espuma_BoundaryProbes"
+        self.path_metadata = self.path / "metadata.json"
+        self._of_case = of_case
 
-        processed_probes_path = of_case.path / "postProcessing/espuma_BoundaryProbes/"
-        self.path_data = list(processed_probes_path.glob("points_*"))
-        self.path_time = processed_probes_path / "time.txt"
-        self.path_xyz = processed_probes_path / "xyz.txt"
-        self.path_field_names = processed_probes_path / "fields.txt"
+        ## Readers are registered in espuma.set_formats
+        self._format = probe_dict["setFormat"].strip()
+        self._reader = get_reader(self._format)
 
-        self._id = str(processed_probes_path.relative_to(of_case.path))
+        self._fields_expression = probe_dict["fields"].strip()
+        self._fields = re.findall(r'[^\s()"]+', self._fields_expression)
 
-        # TODO: Add functionality for CSV and VTK
-        self._format = probe_dict["setFormat"].strip()
+        self._boundaryProbes_to_cache(of_case, **parser_kwargs)
 
-        if self._format != "csv":
-            raise NotImplementedError(
-                f"Only csv format is currently supported. Got {self._format}"
-            )
+        self._id = str(self.path.relative_to(of_case.path))
 
-        self._fields_expression = probe_dict["fields"].strip()
+    def refresh(self, max_workers: Optional[int] = None) -> None:
+        """Add the times written since the cache was last updated"""
+        self._boundaryProbes_to_cache(self._of_case, max_workers=max_workers)
+
+        for name in ("_metadata", "probe_points", "times", "_blocks", "array_data"):
+            self.__dict__.pop(name, None)
+
+    @cached_property
+    def _metadata(self) -> dict:
+        with open(self.path_metadata) as f:
+            return json.load(f)
+
+    @property
+    def path_time(self) -> Path:
+        return self.path / "time.dat"
+
+    @property
+    def path_data(self) -> list[Path]:
+        return [self.path / block["file"] for block in self._metadata["blocks"]]
 
     @property
     def field_names(self) -> list[str]:
@@ -54,10 +78,7 @@ class Boundary_Probe:
 
     @property
     def _field_names(self) -> list[list[str]]:
-        with open(self.path_field_names) as f:
-            names = f.readlines()
-
-        return [name.strip().split() for name in names]
+        return [block["fields"] for block in self._metadata["blocks"]]
 
     @property
     def _n_fields(self) -> list[int]:
@@ -67,34 +88,34 @@ class Boundary_Probe:
     def n_fields(self) -> int:
         return sum(self._n_fields)
 
-    @property
+    @cached_property
     def probe_points(self):
-        with open(self.path_xyz) as f:
-            xyz = f.readlines()
-            xyz = [list(map(float, line.split())) for line in xyz]
-
-        return [Point(*p) for p in xyz]
+        return [Point(*p) for p in self._metadata["xyz"]]
 
     @property
     def n_probes(self):
-        return len(self.probe_points)
+        return len(self._metadata["xyz"])
 
-    @property
-    def times(self):
-        return np.loadtxt(self.path_time)
+    @cached_property
+    def times(self) -> np.ndarray:
+        return read_memmap(self.path_time, (self._metadata["n_times"],))
 
-    @property
+    @cached_property
+    def _blocks(self) -> list[np.ndarray]:
+        """Memory-mapped data of each csv file, as (time, probe, component)"""
+        return [
+            read_memmap(path, (len(self.times), self.n_probes, n_fields))
+            for path, n_fields in zip(self.path_data, self._n_fields)
+        ]
+
+    @cached_property
     def array_data(self):
         data = dict()
 
-        for file_data, field_names, stride in zip(
-            self.path_data, self._field_names, self._n_fields
-        ):
-            full_data = np.loadtxt(file_data).T
-
+        for full_data, field_names in zip(self._blocks, self._field_names):
             for i, field in enumerate(field_names):
                 data[field] = xr.DataArray(
-                    full_data[i::stride] if stride > 1 else [full_data],
+                    full_data[:, :, i].T,
                     dims=("probes", "time"),
                     coords={"probes": self.probe_points, "time": self.times},
                 )
@@ -121,17 +142,30 @@ class Boundary_Probe:
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self._id})"
 
-    def _boundaryProbes_to_txt(self, of_case: Case_Directory, **parser_kwargs):
+    def _boundaryProbes_to_cache(
+        self,
+        of_case: Case_Directory,
+        rebuild: bool = False,
+        max_workers: Optional[int] = None,
+    ):
         """
-        Parse the probe data into single files. The following files are created:
-                - time.txt
-                - xyz.txt
-                - data.txt
-                - fields.txt
+        Parse the probe data into a binary cache. The following files are created:
+                - metadata.json, with the probe locations, field names, number
+                  of times and the modification time of each source folder
+                - time.dat
+                - <name>.dat for every file written at each time in
+                  `setFormat`, with shape (time, probe, component)
+
+        The .dat files are raw float64 arrays that are memory-mapped when read.
+        If the cache exists, only the time folders that are new or were
+        modified since it was written are parsed.
 
         Parameters
         ----------
-        None
+        rebuild : bool
+            Parse all the data again even if the cache already exists.
+        max_workers : int, optional
+            Threads used to read the time folders.
 
         Returns
         -------
@@ -140,64 +174,160 @@ class Boundary_Probe:
         """
 
         bprbs = of_case.path / "postProcessing/boundaryProbes"
-        outbprs = of_case.path / "postProcessing/espuma_BoundaryProbes"
-
-        if not parser_kwargs.get("rebuild", False) and outbprs.exists():
-            print(f"{outbprs.name} already exists :)")
-            return None
+        outbprs = self.path
 
         if not bprbs.exists():
+            if self.path_metadata.exists():
+                return None
+
             raise FileNotFoundError(f"{bprbs.name} does not exist. Nothing to parse")
 
-        if parser_kwargs.get("rebuild", False) or not outbprs.exists():
-            if not outbprs.exists():
-                outbprs.mkdir()
-
-            ## Write times file
-            times = [x for x in bprbs.iterdir() if x.is_dir()]
-            times.sort(key=lambda x: float(x.name))
-
-            with open(outbprs / "time.txt", "w") as out:
-                out.writelines([str(t.name) + "\n" for t in times])
-
-            ## Write probe locations
-            sample = next(times[1].iterdir())  ## Grab a sample
-
-            with open(outbprs / "xyz.txt", "w") as out:
-                with open(sample) as f:
-                    f.readline()  ## Skip header
-
-                    for line in f:
-                        coords = line.split(",")[:3]
-                        out.write(" ".join(coords) + "\n")
-
-            ## Write the fields name file
-            with open(outbprs / "fields.txt", "w") as out:
-                for point_file in times[1].iterdir():
-                    with open(point_file) as f:
-                        out.write(" ".join(f.readline().split(",")[3:]))
-
-            ## Write the data file
-            vars = [f.name for f in times[1].iterdir()]
-            for var in vars:
-                with StringIO() as buffer:
-                    for time in times:
-                        with open(time / var) as f:
-                            r = csv.reader(f, delimiter=",")
-                            r = (
-                                y[3:] for y in list(r)[1:]
-                            )  ## Gets rid of first three columns
-                            r = chain.from_iterable(r)  ## Make single row (drop first)
-                            r = " ".join(r).replace(
-                                "  ", " "
-                            )  ## Format single space separation
-                            buffer.write(r + "\n")
-
-                    with open(outbprs / var, "w") as f:
-                        f.write(buffer.getvalue())
-
-        else:
-            print("postProcessing/espuma_BoundaryProbes already exists.")
+        times = [x for x in bprbs.iterdir() if x.is_dir()]
+        times.sort(key=lambda x: float(x.name))
+
+        metadata = None
+        if not rebuild and self.path_metadata.exists():
+            with open(self.path_metadata) as f:
+                metadata = json.load(f)
+
+            if metadata.get("version") != CACHE_VERSION or metadata.get("format") != self._format:
+                metadata = None
+
+        if metadata is not None:
+            files = [block["source"] for block in metadata["blocks"]]
+            times = [t for t in times if all((t / f).exists() for f in files)]
+            cached = list(metadata["sources"])
+
+            ## Times can only be appended, anything else is parsed again
+            if [t.name for t in times[: len(cached)]] == cached:
+                self._update_cache(metadata, times, max_workers)
+                return None
+
+        outbprs.mkdir(exist_ok=True)
+        self.path_metadata.unlink(missing_ok=True)
+
+        ## Files written at each time, from the first time with output
+        sample = next(t for t in times if any(t.iterdir()))
+        files = sorted(
+            f.name for f in sample.iterdir() if f.is_file() and f.suffix == self._reader.suffix
+        )
+
+        if not files:
+            raise FileNotFoundError(f"No {self._format} files found in {sample}")
+
+        times = [t for t in times if all((t / f).exists() for f in files)]
+
+        headers = [self._reader.read(sample / file, self._fields)[0] for file in files]
+        xyz = self._reader.read(sample / files[0], self._fields)[1][:, :3]
+
+        data = self._read_times(times, files, [(len(xyz), len(names)) for names in headers], max_workers)
+
+        np.array([float(t.name) for t in times]).tofile(outbprs / "time.dat")
+
+        for file, values in data.items():
+            values.tofile(outbprs / (Path(file).stem + ".dat"))
+
+        metadata = {
+            "version": CACHE_VERSION,
+            "format": self._format,
+            "n_times": len(times),
+            "xyz": xyz.tolist(),
+            "blocks": [
+                {"file": Path(file).stem + ".dat", "source": file, "fields": names}
+                for file, names in zip(files, headers)
+            ],
+            "sources": {t.name: _mtime(t, files) for t in times},
+        }
+
+        self._write_metadata(metadata)
+
+    def _update_cache(
+        self,
+        metadata: dict,
+        times: list[Path],
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """
+        Overwrite the rows of the cached times whose folder changed, and
+        append the times that are not in the cache yet.
+        """
+        blocks = metadata["blocks"]
+        files = [block["source"] for block in blocks]
+        shapes = [(len(metadata["xyz"]), len(block["fields"])) for block in blocks]
+        n_times = metadata["n_times"]
+        sources = metadata["sources"]
+
+        mtimes = {t.name: _mtime(t, files) for t in times[:n_times]}
+        changed = [i for i, t in enumerate(times[:n_times]) if mtimes[t.name] != sources[t.name]]
+        new = times[n_times:]
+
+        if not changed and not new:
+            return None
+
+        if changed:
+            data = self._read_times([times[i] for i in changed], files, shapes, max_workers)
+
+            for block, shape in zip(blocks, shapes):
+                cache = np.memmap(self.path / block["file"], np.float64, "r+", shape=(n_times, *shape))
+                cache[changed] = data[block["source"]]
+                cache.flush()
+                del cache
+
+            sources.update({times[i].name: mtimes[times[i].name] for i in changed})
+
+        if new:
+            data = self._read_times(new, files, shapes, max_workers)
+            _append(self.path / "time.dat", n_times, np.array([float(t.name) for t in new]))
+
+            for block in blocks:
+                _append(self.path / block["file"], n_times, data[block["source"]])
+
+            metadata["n_times"] = n_times + len(new)
+            sources.update({t.name: _mtime(t, files) for t in new})
+
+        self._write_metadata(metadata)
+
+    def _read_times(
+        self,
+        times: list[Path],
+        files: list[str],
+        shapes: list[tuple[int, int]],
+        max_workers: Optional[int] = None,
+    ) -> dict[str, np.ndarray]:
+        """Read every time straight into a (time, probe, component) array per file"""
+        data = {file: np.empty((len(times), *shape)) for file, shape in zip(files, shapes)}
+
+        def read_time(i: int, time: Path):
+            for file, values in data.items():
+                values[i] = self._reader.read(time / file, self._fields)[1][:, 3:]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(read_time, range(len(times)), times))
+
+        return data
+
+    def _write_metadata(self, metadata: dict) -> None:
+        ## Written last, so an interrupted parse is not taken as a valid cache
+        with atomic_open(self.path_metadata) as f:
+            f.write(json.dumps(metadata).encode())
+
+
+def _append(path: Path, n_rows: int, values: np.ndarray) -> None:
+    """
+    Write `values` after the first `n_rows` of the raw array in `path`.
+    Anything past them was left by an interrupted update and is dropped.
+    """
+    row_size = values[0].nbytes if len(values) else 0
+
+    with open(path, "r+b") as f:
+        f.truncate(n_rows * row_size)
+        f.seek(0, 2)
+        values.tofile(f)
+
+
+def _mtime(time: Path, files: list[str]) -> int:
+    """Latest modification of a time folder or any of the files read from it"""
+    return max(time.stat().st_mtime_ns, *((time / f).stat().st_mtime_ns for f in files))
 
 
 def main():
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import json
+
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import numpy as np
+import xarray as xr
+
+from .base import Field_File, atomic_open, read_memmap, _cell_values, _gather_cells
+
+if TYPE_CHECKING:
+    from .base import Case_Directory
+
+## Bumped when the layout of the cache changes, so older caches are rebuilt
+CACHE_VERSION = 1
+
+
+class Field_Series:
+    """
+    Internal field `name` of a case over time, read from the time folders
+    into a binary cache in `postProcessing/espuma_fields`:
+
+    - `<name>.json`, with the cached times, the shape of the field and the
+      modification time and size of the file read for each time
+    - `<name>.dat`, a raw float64 array of shape (time, cell[, component])
+      that is memory-mapped when read
+
+    Only the times that are not cached yet, or whose file changed, are
+    parsed. Times only written in the processor folders of a parallel run
+    are gathered from them.
+    """
+
+    def __init__(self, case: Case_Directory, name: str) -> None:
+        self.case = case
+        self.name = name
+        self.path = case.path / "postProcessing/espuma_fields"
+        self.path_metadata = self.path / f"{name}.json"
+        self.path_data = self.path / f"{name}.dat"
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.case.path.name}, {self.name})"
+
+    def read(
+        self,
+        times: Optional[float | Iterable[float]] = None,
+        cells: Optional[slice | np.ndarray] = None,
+        max_workers: Optional[int] = None,
+    ) -> xr.DataArray:
+        """See `Case_Directory.read_field`"""
+        sources = self._sources()
+        selected = self._select(sources, times)
+        metadata = self._update(sources, selected, max_workers)
+
+        cached = metadata["times"]
+        data = read_memmap(self.path_data, (len(cached), *metadata["shape"]))
+
+        index = {t: i for i, t in enumerate(cached)}
+        rows = [index[t] for t in selected]
+
+        ## Consecutive rows are kept as a view of the memory map
+        if rows and rows == list(range(rows[0], rows[0] + len(rows))):
+            data = data[rows[0] : rows[-1] + 1]
+        else:
+            data = data[rows]
+
+        cell = np.arange(metadata["shape"][0])
+
+        if cells is not None:
+            data = data[:, cells]
+            cell = cell[cells]
+
+        return xr.DataArray(
+            data,
+            dims=("time", "cell", "component")[: data.ndim],
+            coords={"time": [float(t) for t in selected], "cell": cell},
+            name=self.name,
+            attrs={"dimensions": metadata["dimensions"]},
+        )
+
+    def _sources(self) -> dict[str, Path]:
+        """
+        File of the field at each time, from the case or, for times that
+        were not reconstructed, from processor0
+        """
+        sources = {
+            t: self.case.path / t / self.name
+            for t in self.case._time_folders()
+            if (self.case.path / t / self.name).is_file()
+        }
+
+        if self.case.is_decomposed:
+            reconstructed = {float(t) for t in sources}
+
+            for t in self.case._time_folders(processor=True):
+                source = self.case.path / "processor0" / t / self.name
+
+                if float(t) not in reconstructed and source.is_file():
+                    sources[t] = source
+
+        return dict(sorted(sources.items(), key=lambda item: float(item[0])))
+
+    def _select(
+        self,
+        sources: dict[str, Path],
+        times: Optional[float | Iterable[float]],
+    ) -> list[str]:
+        if times is None:
+            return list(sources)
+
+        available = np.array([float(t) for t in sources])
+        names = list(sources)
+        selected = []
+
+        for t in np.atleast_1d(times):
+            match = np.flatnonzero(np.isclose(available, t))
+
+            if not len(match):
+                raise ValueError(f"{self.name} was not written at time {t} in {self.case.path}")
+
+            selected.append(names[match[0]])
+
+        return selected
+
+    def _metadata(self) -> Optional[dict]:
+        if not self.path_metadata.exists() or not self.path_data.exists():
+            return None
+
+        with open(self.path_metadata) as f:
+            metadata = json.load(f)
+
+        if metadata.get("version") != CACHE_VERSION:
+            return None
+
+        ## Rows past the cached times may be left by an interrupted update
+        row_size = 8 * int(np.prod(metadata["shape"]))
+        if self.path_data.stat().st_size < len(metadata["times"]) * row_size:
+            return None
+
+        return metadata
+
+    def _update(
+        self,
+        sources: dict[str, Path],
+        selected: list[str],
+        max_workers: Optional[int] = None,
+    ) -> dict:
+        """Parse the selected times that are not cached or changed"""
+        metadata = self._metadata()
+        versions = {t: _version(sources[t]) for t in selected}
+        cached = metadata["sources"] if metadata else {}
+
+        stale = [t for t in selected if cached.get(t) != versions[t]]
+
+        if not stale:
+            if metadata is None:
+                raise FileNotFoundError(f"{self.name} was not found in any time folder of {self.case.path}")
+
+            return metadata
+
+        addressing = self.case._cell_addressing() if self.case.is_decomposed else None
+        first = self._read_time(stale[0], sources[stale[0]], addressing)
+
+        if metadata is not None and tuple(metadata["shape"]) != first.shape:
+            metadata, cached = None, {}
+            stale = list(selected)
+
+        old_times = metadata["times"] if metadata else []
+        new_times = sorted(set(old_times) | set(stale), key=float)
+        row_size = first.nbytes
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        if new_times[: len(old_times)] == old_times:
+            ## Appended after the cached times
+            with open(self.path_data, "r+b" if old_times else "wb") as f:
+                f.truncate(len(new_times) * row_size)
+
+        else:
+            ## Inserted before cached times, the cache is written again in order
+            self.path_metadata.unlink()
+            old = read_memmap(self.path_data, (len(old_times), *first.shape))
+            rows = {t: i for i, t in enumerate(old_times)}
+            blank = np.zeros_like(first).tobytes()
+
+            with atomic_open(self.path_data) as f:
+                for t in new_times:
+                    f.write(old[rows[t]].tobytes() if t in rows else blank)
+
+            del old
+
+        rows = {t: i for i, t in enumerate(new_times)}
+        data = np.memmap(self.path_data, np.float64, "r+", shape=(len(new_times), *first.shape))
+        data[rows[stale[0]]] = first
+
+        def read_time(t: str) -> None:
+            data[rows[t]] = self._read_time(t, sources[t], addressing)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(read_time, stale[1:]))
+
+        data.flush()
+        del data
+
+        if metadata is None:
+            dimensions = str(Field_File(sources[stale[0]]).dimensions)
+        else:
+            dimensions = metadata["dimensions"]
+
+        metadata = {
+            "version": CACHE_VERSION,
+            "field": self.name,
+            "shape": list(first.shape),
+            "dimensions": dimensions,
+            "times": new_times,
+            "sources": {**cached, **{t: versions[t] for t in stale}},
+        }
+
+        ## Written last, so an interrupted parse is not taken as a valid cache
+        with atomic_open(self.path_metadata) as f:
+            f.write(json.dumps(metadata).encode())
+
+        return metadata
+
+    def _read_time(
+        self,
+        t: str,
+        source: Path,
+        addressing: Optional[dict[str, np.ndarray]],
+    ) -> np.ndarray:
+        if source.parent.parent != self.case.path:
+            values = _gather_cells(self.case.path, f"{t}/{self.name}", addressing, self.case.mesh.n_cells)
+            return values.astype(np.float64, copy=False)
+
+        values = Field_File(source).internalField
+
+        if isinstance(values, str):
+            return _cell_values(values, self.case.mesh.n_cells)
+
+        return np.asarray(values, dtype=np.float64)
+
+
+def _version(path: Path) -> list[int]:
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
@@ -0,0 +1,874 @@
+"""
+Pure-Python reader for the OpenFOAM dictionary (FoamFile) format.
+
+The whole file is tokenized in a single pass and turned into a tree of
+nested dictionaries. Leaf values are returned as the text they span in the
+file, without the terminating semicolon and with comments replaced by a
+space. Function entries (`#include`, `#includeEtc`, `#includeFunc`, ...) and
+macros (`$var`) are not expanded, they are kept as raw text. Repeated
+function entries in the same dictionary are numbered from the second one,
+as `#include`, `#include_2`, ...
+
+Lists such as `nonuniform List<vector> N(...)` are not tokenized. They are
+skipped in a single search and returned as `OpenFoam_List`, a lazy reference
+that is read straight into a NumPy array when needed, either by a chunked
+vectorized parser (ascii) or as a memory map (binary).
+
+Entries can also be set or removed in place, leaving the rest of the file
+(comments, alignment, ordering) untouched.
+"""
+
+from __future__ import annotations
+
+import re
+import mmap
+
+from pathlib import Path
+from dataclasses import dataclass
+from contextlib import contextmanager
+from collections.abc import Iterator, Mapping
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+_SKIP = re.compile(rb"(?:\s+|//[^\n]*|/\*.*?\*/)+", re.DOTALL)
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_VERBATIM = re.compile(rb"#\{.*?#\}", re.DOTALL)
+_WORD = re.compile(rb'[^\s{}()\[\];"]+')
+
+_PUNCTUATION = frozenset(b"{}()[];")
+_OPENING = {"(": ")", "[": "]", "{": "}"}
+_NUMBER_START = frozenset(b"0123456789+-.")
+
+_LINE_END = re.compile(rb"[ \t]*\n")
+_LIST_END = re.compile(rb"\)")
+_NESTED_LIST_END = re.compile(rb"\)\s*\)")
+_BRACKETS_TO_SPACE = bytes.maketrans(b"()", b"  ")
+
+## Number of components of each OpenFOAM primitive type
+COMPONENTS = {
+    "scalar": 1,
+    "label": 1,
+    "sphericalTensor": 1,
+    "vector": 3,
+    "symmTensor": 6,
+    "tensor": 9,
+}
+
+TYPES = {n: value_type for value_type, n in reversed(COMPONENTS.items()) if value_type != "label"}
+
+CHUNK_SIZE = 1 << 24  ## Bytes parsed or written at once
+
+## Value type of files holding a single list, by their class, as in `labelList`
+LIST_CLASSES = {
+    f"{value_type}{suffix}": value_type
+    for value_type in COMPONENTS
+    for suffix in ("List", "Field", "IOField")
+}
+
+_BANNER = "/*--------------------------------*- C++ -*----------------------------------*\\"
+_SEPARATOR = "// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //"
+_END = "// ************************************************************************* //"
+
+
+@dataclass(slots=True, frozen=True)
+class Token:
+    text: str
+    start: int
+    end: int
+
+    @property
+    def is_punctuation(self) -> bool:
+        return len(self.text) == 1 and ord(self.text) in _PUNCTUATION
+
+
+class Tokenizer:
+    """
+    Lazy tokenizer over a bytes-like buffer (bytes, mmap, ...).
+    Positions are byte offsets in the buffer.
+    """
+
+    def __init__(
+        self,
+        buffer: bytes | mmap.mmap,
+        pos: int = 0,
+        source: Optional[Path] = None,
+    ) -> None:
+        self.buffer = buffer
+        self.pos = pos
+        self.last_end = pos
+        self._peeked: Optional[Token] = None
+
+        ## Where lists are read from later on, and how they are stored
+        self.source = source
+        self.header: Mapping = {}
+
+    @property
+    def binary(self) -> bool:
+        return is_binary(self.header)
+
+    def set_format(self, header: Mapping) -> None:
+        """Take the storage format from the FoamFile header"""
+        self.header = header
+
+    def jump(self, pos: int) -> None:
+        self.pos = self.last_end = pos
+        self._peeked = None
+
+    def peek(self) -> Optional[Token]:
+        if self._peeked is None:
+            self._peeked = self._read()
+        return self._peeked
+
+    def next(self) -> Optional[Token]:
+        token = self.peek()
+        self._peeked = None
+
+        if token is not None:
+            self.last_end = token.end
+
+        return token
+
+    def _read(self) -> Optional[Token]:
+        buffer = self.buffer
+        pos = self.pos
+
+        skip = _SKIP.match(buffer, pos)
+        if skip:
+            pos = skip.end()
+
+        if pos >= len(buffer):
+            self.pos = pos
+            return None
+
+        char = buffer[pos]
+
+        if char in _PUNCTUATION:
+            end = pos + 1
+
+        elif char == ord('"'):
+            match = _STRING.match(buffer, pos)
+            if match is None:
+                raise ValueError(f"Unterminated string starting at byte {pos}")
+            end = match.end()
+
+        elif buffer[pos : pos + 2] == b"#{":
+            match = _VERBATIM.match(buffer, pos)
+            if match is None:
+                raise ValueError(f"Unterminated verbatim block starting at byte {pos}")
+            end = match.end()
+
+        else:
+            end = self._word_end(pos)
+
+        self.pos = end
+        return Token(bytes(buffer[pos:end]).decode("utf-8", errors="replace"), pos, end)
+
+    def _word_end(self, pos: int) -> int:
+        """
+        Words such as `div(phi,U)` keep their balanced parentheses, as
+        OpenFOAM does. Numbers never do, so `3(1 2 3)` splits into `3` and a list.
+        """
+        buffer = self.buffer
+        end = _WORD.match(buffer, pos).end()
+
+        if buffer[pos] in _NUMBER_START:
+            return end
+
+        depth = 0
+        while end < len(buffer):
+            char = buffer[end]
+
+            if char == ord("("):
+                depth += 1
+            elif char == ord(")") and depth > 0:
+                depth -= 1
+            else:
+                break
+
+            end += 1
+            match = _WORD.match(buffer, end)
+            if match:
+                end = match.end()
+
+        return end
+
+
+def is_binary(header: Mapping) -> bool:
+    """Whether lists are written in binary according to the FoamFile header"""
+    return header.get("format", "ascii") == "binary"
+
+
+def list_dtype(value_type: str, header: Mapping) -> str:
+    """NumPy dtype of the components of a `List<value_type>`"""
+    if not is_binary(header):
+        return "int64" if value_type == "label" else "float64"
+
+    byte_order, sizes = "<", {"label": 32, "scalar": 64}
+
+    for field in header.get("arch", "").strip('"').split(";"):
+        if field == "MSB":
+            byte_order = ">"
+        elif "=" in field:
+            name, size = field.split("=", maxsplit=1)
+            sizes[name] = int(size)
+
+    if value_type == "label":
+        return f"{byte_order}i{sizes['label'] // 8}"
+    return f"{byte_order}f{sizes['scalar'] // 8}"
+
+
+@dataclass(slots=True, frozen=True)
+class List_Token(Token):
+    data: OpenFoam_List
+
+
+@dataclass(slots=True, frozen=True)
+class OpenFoam_List:
+    """
+    Lazy reference to a `List<Type>` written in a file (or buffer). Values
+    are read with `to_numpy`, or `np.asarray`, with shape (N,) for scalars
+    and (N, n_components) otherwise.
+    """
+
+    source: Path | bytes
+    value_type: str
+    size: int
+    start: int
+    end: int
+    binary: bool = False
+    dtype: str = "<f8"
+    uniform: Optional[str] = None
+
+    @property
+    def n_components(self) -> int:
+        return COMPONENTS[self.value_type]
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        if self.n_components == 1:
+            return (self.size,)
+        return (self.size, self.n_components)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __str__(self) -> str:
+        return f"nonuniform List<{self.value_type}> {self.size}(...)"
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(List<{self.value_type}>, shape={self.shape})"
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        array = self.to_numpy()
+        return array if dtype is None else array.astype(dtype)
+
+    def to_numpy(self) -> np.ndarray:
+        """
+        Read the values. Binary lists are returned as a read-only memory map
+        of the file, so no data is copied until it is used.
+        """
+        count = self.size * self.n_components
+
+        if self.uniform is not None:
+            value = np.fromstring(self.uniform.translate(_BRACKETS_TO_SPACE), sep=" ")
+            return np.tile(value.astype(self.dtype), (self.size, 1)).reshape(self.shape)
+
+        if self.binary:
+            if isinstance(self.source, Path):
+                return np.memmap(
+                    self.source, dtype=self.dtype, mode="r", offset=self.start, shape=self.shape
+                )
+            return np.frombuffer(
+                self.source, dtype=self.dtype, count=count, offset=self.start
+            ).reshape(self.shape)
+
+        if isinstance(self.source, Path):
+            with open(self.source, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    values = _read_ascii(buffer, self.start, self.end, count, self.dtype)
+        else:
+            values = _read_ascii(self.source, self.start, self.end, count, self.dtype)
+
+        return values.reshape(self.shape)
+
+
+def _read_ascii(buffer, start: int, end: int, count: int, dtype: str) -> np.ndarray:
+    """
+    Parse whitespace separated numbers (brackets are ignored) in chunks, so
+    the whole list is never held as text in memory.
+    """
+    values = np.empty(count, dtype=dtype)
+    filled = 0
+    pos = start
+
+    while pos < end:
+        stop = min(pos + CHUNK_SIZE, end)
+
+        if stop < end:  ## Do not split a number between chunks
+            stop = max(buffer.rfind(b" ", pos, stop), buffer.rfind(b"\n", pos, stop)) + 1
+            if stop <= pos:
+                stop = end
+
+        chunk = bytes(buffer[pos:stop]).translate(_BRACKETS_TO_SPACE)
+        parsed = np.fromstring(chunk, dtype=dtype, sep=" ")
+
+        if filled + parsed.size > count:
+            raise ValueError(f"Expected {count} values, found more")
+
+        values[filled : filled + parsed.size] = parsed
+        filled += parsed.size
+        pos = stop
+
+    if filled != count:
+        raise ValueError(f"Expected {count} values, found {filled}")
+
+    return values
+
+
+def write_list(f, values: np.ndarray, header: Mapping, precision: int = 12) -> None:
+    """
+    Stream `values` to the binary file object `f` as `List<Type> N(...)`,
+    in ascii or binary as set in `header`. Values are written in chunks,
+    so no full-size copy or string of the list is made.
+    """
+    values = np.asarray(values)
+
+    if values.ndim == 2 and values.shape[1] == 1:
+        values = values[:, 0]
+
+    n_components = 1 if values.ndim == 1 else values.shape[1]
+
+    if values.ndim > 2 or n_components not in TYPES:
+        raise ValueError(f"Cannot write an array of shape {values.shape} as an OpenFOAM list")
+
+    value_type = TYPES[n_components]
+    rows = max(1, CHUNK_SIZE // (8 * n_components))
+
+    f.write(f"List<{value_type}> \n{len(values)}\n(".encode())
+
+    if is_binary(header):
+        dtype = list_dtype(value_type, header)
+        for i in range(0, len(values), rows):
+            f.write(np.ascontiguousarray(values[i : i + rows], dtype=dtype).tobytes())
+
+    else:
+        fmt = f"%.{precision}g"
+        if n_components > 1:
+            fmt = "(" + " ".join([fmt] * n_components) + ")"
+
+        ## Each chunk is formatted in one step, not row by row as np.savetxt
+        f.write(b"\n")
+        for i in range(0, len(values), rows):
+            chunk = values[i : i + rows]
+            f.write((((fmt + "\n") * len(chunk)) % tuple(chunk.ravel().tolist())).encode())
+
+    f.write(b")\n")
+
+
+@dataclass(slots=True)
+class Entry_Span:
+    """
+    Byte offsets of an entry in the file. `value_end` excludes the
+    terminating semicolon, `end` includes it. The value of a subdictionary
+    spans from its opening to its closing brace.
+    """
+
+    start: int
+    value_start: int
+    value_end: int
+    end: int
+    children: Optional[Dict_Span] = None
+
+
+@dataclass(slots=True)
+class Dict_Span:
+    """Layout of a (sub)dictionary: its entries and where new ones can go"""
+
+    depth: int
+    insert_at: int
+    entries: dict[str, Entry_Span]
+
+
+def parse(
+    buffer: bytes | mmap.mmap,
+    dict_type: Callable[[list], Any] = dict,
+    source: Optional[Path] = None,
+) -> Any:
+    """
+    Parse the contents of an OpenFOAM dictionary file.
+
+    Parameters
+    ----------
+    buffer : bytes | mmap.mmap
+        Raw contents of the file.
+    dict_type : Callable
+        Constructor used for every (sub)dictionary. It receives the list of
+        (keyword, value) pairs.
+    source : Path, optional
+        File the buffer was read from. Lists found in the buffer are read
+        from this file later on. If None, they keep a reference to `buffer`.
+
+    Returns
+    -------
+    dict_type
+        Tree of dictionaries with token strings or OpenFoam_List as leaves.
+
+    """
+    return _parse_entries(Tokenizer(buffer, source=source), dict_type, closing=None)
+
+
+def layout(buffer: bytes | mmap.mmap) -> Dict_Span:
+    """Locate every entry of the file, keeping comments and formatting intact"""
+    spans = Dict_Span(depth=0, insert_at=len(buffer), entries={})
+    _parse_entries(Tokenizer(buffer), dict, closing=None, spans=spans)
+    return spans
+
+
+def format_entry(keyword: str, value: Any, depth: int = 0) -> str:
+    """Write an entry as OpenFOAM does. Mappings are written as subdictionaries."""
+    indent = "    " * depth
+
+    if isinstance(value, Mapping):
+        lines = [f"{indent}{keyword}", f"{indent}{{"]
+        lines.extend(format_entry(k, v, depth + 1) for k, v in value.items())
+        lines.append(f"{indent}}}")
+        return "\n".join(lines)
+
+    return f"{indent}{keyword:<15} {value};"
+
+
+def format_file(entries: Mapping, header: Mapping) -> str:
+    """Contents of a new dictionary file with the given FoamFile `header`"""
+    header = {"version": "2.0", "format": "ascii", "class": "dictionary", **header}
+
+    lines = [_BANNER, "\\*" + "-" * 75 + "*/", format_entry("FoamFile", header), _SEPARATOR, ""]
+    lines.extend(format_entry(keyword, value) for keyword, value in entries.items())
+    lines.extend(["", _END, ""])
+
+    return "\n".join(lines)
+
+
+def set_entry(buffer: bytes, entry: str, value: Any) -> bytes:
+    """
+    Set the value of `entry` (as scoped `name.key`) and return the new contents.
+    Missing entries and parent dictionaries are created.
+    """
+    start, end, text = splice_entry(buffer, entry, value)
+    return buffer[:start] + text.encode() + buffer[end:]
+
+
+def splice_entry(buffer: bytes | mmap.mmap, entry: str, value: Any) -> tuple[int, int, str]:
+    """
+    Work out how to set `entry` without rewriting the rest of the file:
+    `buffer[start:end]` has to be replaced by `text`.
+    """
+    spans = layout(buffer)
+    parent, keyword, missing = _resolve(spans, entry)
+
+    if missing:
+        for key in reversed(missing[1:] + [keyword]):
+            value = {key: value}
+        keyword = missing[0]
+
+    span = parent.entries.get(keyword)
+
+    if span is None:
+        return _insert(buffer, parent, format_entry(keyword, value, parent.depth))
+
+    if span.children is None and not isinstance(value, Mapping):
+        text = str(value) if span.value_start < span.value_end else f" {value}"
+        return span.value_start, span.value_end, text
+
+    text = format_entry(keyword, value, parent.depth).lstrip()
+    return span.start, span.end, text
+
+
+def remove_entry(buffer: bytes, entry: str) -> bytes:
+    """Remove `entry` (as scoped `name.key`) and return the new contents"""
+    parent, keyword, missing = _resolve(layout(buffer), entry)
+    span = parent.entries.get(keyword)
+
+    if missing or span is None:
+        raise KeyError(entry)
+
+    start, end = span.start, span.end
+
+    ## Drop the whole line if nothing else is left on it
+    line_start = buffer.rfind(b"\n", 0, start) + 1
+    if not buffer[line_start:start].strip():
+        start = line_start
+
+    line_end = buffer.find(b"\n", end)
+    line_end = len(buffer) if line_end < 0 else line_end + 1
+    if not buffer[end:line_end].strip():
+        end = line_end
+
+    return buffer[:start] + buffer[end:]
+
+
+def _resolve(spans: Dict_Span, entry: str) -> tuple[Dict_Span, str, list[str]]:
+    """
+    Find the dictionary holding `entry`. Returns that dictionary, the
+    keyword and the list of parent dictionaries that do not exist yet.
+    """
+    if entry in spans.entries or "." not in entry:
+        return spans, entry, []
+
+    prekey, poskey = entry.split(".", maxsplit=1)
+    parent = spans.entries.get(prekey)
+
+    if parent is None:
+        *missing, keyword = entry.split(".")
+        return spans, keyword, missing
+
+    if parent.children is None:
+        raise ValueError(f"'{prekey}' is not a dictionary")
+
+    return _resolve(parent.children, poskey)
+
+
+def _insert(buffer: bytes | mmap.mmap, spans: Dict_Span, text: str) -> tuple[int, int, str]:
+    pos = spans.insert_at
+
+    if spans.depth > 0 and not spans.entries and not _LINE_END.match(buffer, pos):
+        ## Empty dictionary: keep its closing brace on a line of its own
+        text += "\n" + "    " * (spans.depth - 1)
+
+    if spans.entries or spans.depth > 0 or buffer[pos - 1 : pos] not in (b"", b"\n"):
+        text = "\n" + text
+
+    if pos == len(buffer):
+        text += "\n"
+
+    return pos, pos, text
+
+
+def parse_file(path: str | Path, dict_type: Callable[[list], Any] = dict) -> Any:
+    """Parse an OpenFOAM dictionary file from a single read of `path`."""
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  ## Empty files cannot be mapped
+            return dict_type([])
+
+    with buffer:
+        return parse(buffer, dict_type, source=Path(path))
+
+
+def parse_list_file(path: str | Path, value_type: Optional[str] = None) -> OpenFoam_List:
+    """
+    Read a file that holds a single list after its FoamFile header, such as
+    `constant/polyMesh/owner` or `cellProcAddressing`. The type of the list
+    is taken from the class in the header if not given.
+    """
+    with _list_file(path) as (tokens, header):
+        value_type = value_type or LIST_CLASSES.get(header.get("class", ""))
+
+        if value_type is None:
+            raise ValueError(f"Cannot tell the type of the list in {path}")
+
+        data = _parse_list(tokens, value_type)
+
+    if data is None:
+        raise ValueError(f"No List<{value_type}> found in {path}")
+
+    return data.data
+
+
+def parse_face_file(path: str | Path) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Read a list of faces, such as `constant/polyMesh/faces`, written as a
+    `faceList` (`N(4(0 1 2 3) ...)`, ascii only) or as a `faceCompactList`
+    (a list of offsets followed by a list of point labels).
+
+    Returns
+    -------
+    labels : np.ndarray
+        Point labels of every face, one face after the other.
+    offsets : np.ndarray
+        Start of every face in `labels`, with shape (n_faces + 1,).
+    """
+    with _list_file(path) as (tokens, header):
+        if header.get("class") == "faceCompactList":
+            offsets = _parse_list(tokens, "label")
+
+            if (token := tokens.peek()) is not None and token.text.startswith("List<"):
+                tokens.next()
+
+            labels = _parse_list(tokens, "label")
+
+            if offsets is None or labels is None:
+                raise ValueError(f"Expected two lists of labels in {path}")
+
+            return np.asarray(labels.data), np.asarray(offsets.data)
+
+        if tokens.binary:
+            raise ValueError(f"Binary faceList in {path}. Only faceCompactList can be binary")
+
+        size = tokens.next()
+        opening = tokens.peek()
+
+        if size is None or not size.text.isdigit() or opening is None or opening.text != "(":
+            raise ValueError(f"No faceList found in {path}")
+
+        n_faces = int(size.text)
+        if n_faces == 0:
+            return np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+
+        end = _NESTED_LIST_END.search(tokens.buffer, opening.end)
+        if end is None:
+            raise ValueError(f"Unterminated faceList in {path}")
+
+        ## Sizes are the only values followed by an opening bracket
+        text = bytes(tokens.buffer[opening.end : end.start() + 1])
+        values = np.fromstring(text.replace(b"(", b" -1 ").replace(b")", b" "), dtype=np.int64, sep=" ")
+
+    markers = np.flatnonzero(values == -1)
+    if len(markers) != n_faces:
+        raise ValueError(f"Expected {n_faces} faces in {path}. Got {len(markers)}")
+
+    is_label = np.ones(len(values), dtype=bool)
+    is_label[markers] = is_label[markers - 1] = False
+
+    offsets = np.zeros(n_faces + 1, dtype=np.int64)
+    np.cumsum(values[markers - 1], out=offsets[1:])
+
+    return values[is_label], offsets
+
+
+def parse_boundary_file(path: str | Path, dict_type: Callable[[list], Any] = dict) -> Any:
+    """
+    Read a list of named dictionaries, such as `constant/polyMesh/boundary`,
+    as a single dictionary.
+    """
+    with _list_file(path) as (tokens, _):
+        size = tokens.next()
+        opening = tokens.next()
+
+        if size is None or not size.text.isdigit() or opening is None or opening.text != "(":
+            raise ValueError(f"No list of dictionaries found in {path}")
+
+        return _parse_entries(tokens, dict_type, closing=")")
+
+
+@contextmanager
+def _list_file(path: str | Path) -> Iterator[tuple[Tokenizer, Mapping]]:
+    """Tokens of a file after its FoamFile header, and the header"""
+    path = Path(path)
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            tokens = Tokenizer(buffer, source=path)
+            header = {}
+
+            if (token := tokens.peek()) is not None and token.text == "FoamFile":
+                tokens.next()
+                tokens.next()
+                header = _parse_entries(tokens, dict, closing="}")
+                tokens.set_format(header)
+
+            ## As written by write_list
+            if (token := tokens.peek()) is not None and token.text.startswith("List<"):
+                tokens.next()
+
+            yield tokens, header
+
+
+def _parse_entries(
+    tokens: Tokenizer,
+    dict_type: Callable,
+    closing: Optional[str],
+    spans: Optional[Dict_Span] = None,
+) -> Any:
+    entries = []
+    directives: dict[str, int] = {}
+
+    while True:
+        token = tokens.next()
+
+        if token is None:
+            if closing is not None:
+                raise ValueError(f"Unexpected end of file, expected '{closing}'")
+            break
+
+        if token.text == closing:
+            break
+
+        if token.text == ";":  ## Stray semicolons, e.g. after a subdictionary
+            if spans is not None:
+                spans.insert_at = token.end
+            continue
+
+        if token.is_punctuation:
+            raise ValueError(f"Unexpected '{token.text}' at byte {token.start}")
+
+        keyword = token.text
+
+        if keyword.startswith("#"):
+            ## Function entries are kept as raw text and not expanded. Repeated
+            ## ones are numbered from the second, as `#include_2`
+            directives[keyword] = directives.get(keyword, 0) + 1
+            if directives[keyword] > 1:
+                keyword = f"{keyword}_{directives[keyword]}"
+
+            entries.append((keyword, _source_text(tokens.buffer, _parse_directive(tokens))))
+            if spans is not None:
+                spans.insert_at = tokens.last_end
+            continue
+
+        following = tokens.peek()
+        children = None
+
+        if following is not None and following.text == "{":
+            tokens.next()
+
+            if spans is not None:
+                children = Dict_Span(depth=spans.depth + 1, insert_at=following.end, entries={})
+
+            entries.append(
+                (keyword, _parse_entries(tokens, dict_type, closing="}", spans=children))
+            )
+            value_start, value_end = following.start, tokens.last_end
+
+            if keyword == "FoamFile" and closing is None:
+                tokens.set_format(entries[-1][1])
+
+        else:
+            value = _parse_value(tokens)
+            lists = [t.data for t in value if isinstance(t, List_Token)]
+            entries.append((keyword, lists[0] if lists else _source_text(tokens.buffer, value)))
+            value_start = value[0].start if value else token.end
+            value_end = value[-1].end if value else token.end
+
+        if spans is not None:
+            spans.entries[keyword] = Entry_Span(
+                token.start, value_start, value_end, tokens.last_end, children
+            )
+            spans.insert_at = tokens.last_end
+
+    return dict_type(entries)
+
+
+def _source_text(buffer: bytes | mmap.mmap, value: list[Token]) -> str:
+    """
+    Text of the tokens of `value` as written in the file. Comments between
+    them are replaced by a space.
+    """
+    if not value:
+        return ""
+
+    parts = [bytes(buffer[value[0].start : value[0].end])]
+
+    for previous, token in zip(value, value[1:]):
+        gap = bytes(buffer[previous.end : token.start])
+        parts.append(b" " if b"/" in gap else gap)
+        parts.append(bytes(buffer[token.start : token.end]))
+
+    return b"".join(parts).decode("utf-8", errors="replace")
+
+
+def _parse_directive(tokens: Tokenizer) -> list[Token]:
+    """Function entries take a single argument, which can be a bracketed group"""
+    token = tokens.next()
+
+    if token is None:
+        return []
+
+    if token.text not in _OPENING:
+        return [token]
+
+    return [token] + _parse_group(tokens, _OPENING[token.text])
+
+
+def _parse_group(tokens: Tokenizer, closing: str) -> list[Token]:
+    group = []
+
+    while True:
+        token = tokens.next()
+
+        if token is None:
+            raise ValueError(f"Unexpected end of file, expected '{closing}'")
+
+        group.append(token)
+
+        if token.text == closing:
+            return group
+
+        if token.text in _OPENING:
+            group.extend(_parse_group(tokens, _OPENING[token.text]))
+
+
+def _parse_value(tokens: Tokenizer) -> list[Token]:
+    """Collect the tokens of a primitive entry up to its terminating semicolon"""
+    value = []
+
+    while True:
+        token = tokens.peek()
+
+        if token is None or token.text == "}":
+            return value
+
+        tokens.next()
+
+        if token.text == ";":
+            return value
+
+        value.append(token)
+
+        if token.text in _OPENING:
+            value.extend(_parse_group(tokens, _OPENING[token.text]))
+
+        elif token.text.startswith("List<") and token.text.endswith(">"):
+            data = _parse_list(tokens, token.text[5:-1])
+            if data is not None:
+                value.append(data)
+
+
+def _parse_list(tokens: Tokenizer, value_type: str) -> Optional[List_Token]:
+    """
+    Skip over the contents of a `List<Type> N(...)` without tokenizing them.
+    Returns None if the list is not in that form, e.g. with a macro as size.
+    """
+    size = tokens.peek()
+
+    if value_type not in COMPONENTS or size is None or not size.text.isdigit():
+        return None
+
+    buffer = tokens.buffer
+    skip = _SKIP.match(buffer, size.end)
+    pos = skip.end() if skip else size.end
+
+    if buffer[pos : pos + 1] not in (b"(", b"{"):
+        return None
+
+    tokens.next()
+    n = int(size.text)
+    n_components = COMPONENTS[value_type]
+    source = tokens.source or buffer
+
+    dtype = list_dtype(value_type, tokens.header)
+
+    if buffer[pos] == ord("{"):  ## Same value for every element, as in `N{0}`
+        tokens.next()
+        uniform = " ".join(t.text for t in _parse_group(tokens, "}")[:-1])
+        data = OpenFoam_List(source, value_type, n, pos, tokens.last_end, dtype=dtype, uniform=uniform)
+        return List_Token("", size.start, tokens.last_end, data)
+
+    start = pos + 1
+
+    if tokens.binary and n > 0:
+        end = start + n * n_components * np.dtype(dtype).itemsize
+        if buffer[end : end + 1] != b")":
+            raise ValueError(f"Corrupted binary List<{value_type}> at byte {start}")
+
+    else:
+        pattern = _NESTED_LIST_END if n_components > 1 and n > 0 else _LIST_END
+        match = pattern.search(buffer, start)
+        if match is None:
+            raise ValueError(f"Unterminated List<{value_type}> at byte {start}")
+        end = match.end() - 1
+
+    tokens.jump(end + 1)
+    data = OpenFoam_List(source, value_type, n, start, end, binary=tokens.binary, dtype=dtype)
+    return List_Token("", size.start, end + 1, data)
@@ -0,0 +1,199 @@
+"""
+Geometry of an OpenFOAM polyMesh as NumPy arrays, read straight from
+`constant/polyMesh` without VTK.
+
+>>> mesh = case.mesh
+>>> mesh.cell_centres.shape, mesh.cell_volumes.sum()
+
+Face and cell centres, areas and volumes are computed as in OpenFOAM's
+`primitiveMesh`: faces are split in triangles around the average of their
+points, and cells in pyramids around the average of their face centres.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from functools import cached_property
+
+import numpy as np
+
+from .foam_parser import parse_boundary_file, parse_face_file, parse_list_file
+
+## Below this, a face area or a cell volume is taken as zero, as in OpenFOAM
+VSMALL = 1e-300
+
+
+class Poly_Mesh:
+    """
+    Mesh in a `polyMesh` folder. Every array is read or computed on first
+    access and kept.
+
+    Faces are stored as in a `faceCompactList`: the points of face `i` are
+    `face_labels[face_offsets[i]:face_offsets[i + 1]]`. Internal faces come
+    first, and `neighbour` has one entry for each of them.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        path = Path(path).absolute()
+
+        if not (path / "owner").is_file():
+            raise FileNotFoundError(f"No polyMesh found in {path}")
+
+        self.path = path
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path})"
+
+    @cached_property
+    def points(self) -> np.ndarray:
+        """(n_points, 3)"""
+        return np.asarray(parse_list_file(self.path / "points", "vector"), dtype=float)
+
+    @cached_property
+    def _faces(self) -> tuple[np.ndarray, np.ndarray]:
+        return parse_face_file(self.path / "faces")
+
+    @property
+    def face_labels(self) -> np.ndarray:
+        return self._faces[0]
+
+    @property
+    def face_offsets(self) -> np.ndarray:
+        """(n_faces + 1,)"""
+        return self._faces[1]
+
+    @cached_property
+    def owner(self) -> np.ndarray:
+        """(n_faces,)"""
+        return np.asarray(parse_list_file(self.path / "owner", "label"))
+
+    @cached_property
+    def neighbour(self) -> np.ndarray:
+        """(n_internal_faces,)"""
+        return np.asarray(parse_list_file(self.path / "neighbour", "label"))
+
+    @cached_property
+    def boundary(self) -> dict[str, dict]:
+        """Patches with their settings. `nFaces` and `startFace` are ints"""
+        patches = parse_boundary_file(self.path / "boundary")
+
+        for patch in patches.values():
+            for key in ("nFaces", "startFace"):
+                patch[key] = int(patch[key])
+
+        return patches
+
+    @property
+    def n_faces(self) -> int:
+        return len(self.owner)
+
+    @property
+    def n_internal_faces(self) -> int:
+        return len(self.neighbour)
+
+    @cached_property
+    def n_cells(self) -> int:
+        return int(max(self.owner.max(initial=-1), self.neighbour.max(initial=-1))) + 1
+
+    def patch_faces(self, name: str) -> slice:
+        """Faces of the patch `name`"""
+        patch = self.boundary[name]
+        return slice(patch["startFace"], patch["startFace"] + patch["nFaces"])
+
+    @property
+    def face_centres(self) -> np.ndarray:
+        """(n_faces, 3)"""
+        return self._face_geometry[0]
+
+    @property
+    def face_areas(self) -> np.ndarray:
+        """(n_faces, 3) area vectors, pointing out of the owner cell"""
+        return self._face_geometry[1]
+
+    @property
+    def cell_centres(self) -> np.ndarray:
+        """(n_cells, 3)"""
+        return self._cell_geometry[0]
+
+    @property
+    def cell_volumes(self) -> np.ndarray:
+        """(n_cells,)"""
+        return self._cell_geometry[1]
+
+    @cached_property
+    def _face_geometry(self) -> tuple[np.ndarray, np.ndarray]:
+        labels, offsets = self.face_labels, self.face_offsets
+        starts, sizes = offsets[:-1], np.diff(offsets)
+
+        if np.any(sizes < 3):
+            raise ValueError(f"Faces with less than 3 points in {self.path}")
+
+        ## Every edge of every face, from each point to the next one
+        this = self.points[labels]
+        following = np.arange(1, len(labels) + 1)
+        following[offsets[1:] - 1] = starts
+        following = this[following]
+
+        estimate = np.add.reduceat(this, starts) / sizes[:, None]
+        estimate_per_edge = np.repeat(estimate, sizes, axis=0)
+
+        ## Triangles between the edges and the estimated centre
+        normals = np.cross(following - this, estimate_per_edge - this)
+        areas = np.linalg.norm(normals, axis=1)
+        centres = this + following + estimate_per_edge
+
+        sum_normals = np.add.reduceat(normals, starts)
+        sum_areas = np.add.reduceat(areas, starts)
+        sum_centres = np.add.reduceat(areas[:, None] * centres, starts)
+
+        degenerate = sum_areas < VSMALL
+        face_centres = np.where(
+            degenerate[:, None],
+            estimate,
+            sum_centres / (3 * np.where(degenerate, 1, sum_areas))[:, None],
+        )
+        face_areas = np.where(degenerate[:, None], 0.0, 0.5 * sum_normals)
+
+        return face_centres, face_areas
+
+    @cached_property
+    def _cell_geometry(self) -> tuple[np.ndarray, np.ndarray]:
+        face_centres, face_areas = self._face_geometry
+        owner, neighbour = self.owner, self.neighbour
+        n_cells, n_internal = self.n_cells, self.n_internal_faces
+
+        ## Estimated centre, the average of the face centres
+        n_faces = np.bincount(owner, minlength=n_cells) + np.bincount(neighbour, minlength=n_cells)
+        estimate = np.stack(
+            [
+                np.bincount(owner, face_centres[:, j], n_cells)
+                + np.bincount(neighbour, face_centres[:n_internal, j], n_cells)
+                for j in range(3)
+            ],
+            axis=1,
+        ) / np.maximum(n_faces, 1)[:, None]
+
+        ## Pyramids from every face to the estimated centre of both its cells
+        cells = np.concatenate([owner, neighbour])
+        apexes = estimate[cells]
+        bases = np.concatenate([face_centres, face_centres[:n_internal]])
+        signs = np.concatenate([np.ones(len(owner)), -np.ones(n_internal)])
+
+        volumes = signs * np.einsum(
+            "ij,ij->i", np.concatenate([face_areas, face_areas[:n_internal]]), bases - apexes
+        )
+        centres = 0.75 * bases + 0.25 * apexes
+
+        cell_volumes = np.bincount(cells, volumes, n_cells)
+        cell_centres = np.stack(
+            [np.bincount(cells, volumes * centres[:, j], n_cells) for j in range(3)], axis=1
+        )
+
+        degenerate = np.abs(cell_volumes) < VSMALL
+        cell_centres = np.where(
+            degenerate[:, None],
+            estimate,
+            cell_centres / np.where(degenerate, 1, cell_volumes)[:, None],
+        )
+
+        return cell_centres, cell_volumes / 3
@@ -0,0 +1,166 @@
+"""
+Parsed dictionaries shared by every `OpenFoam_File` of the process.
+
+A parsed file is reused as long as its modification time, size and inode
+are unchanged. The most recently used `max_entries` files are kept in
+memory. Files written by espuma are dropped from the cache right away.
+
+The cache can also be kept on disk, as pickle files in a folder given by
+`set_parse_cache(cache_dir=...)` or by the `ESPUMA_PARSE_CACHE` environment
+variable. Worker processes then reuse what other processes parsed. Only
+point it to a folder no one else can write to, since pickle files can run
+code when loaded. The folder can be deleted at any time.
+
+>>> set_parse_cache(cache_dir="~/.cache/espuma")
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+
+from pathlib import Path
+from threading import Lock
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from .time_folders import _RACY_NS
+
+## Bumped when the parsed trees change, so older pickles are not loaded
+CACHE_VERSION = 1
+
+_max_entries = 1024
+_entries: OrderedDict[tuple[str, str], tuple[tuple[int, int, int], Any]] = OrderedDict()
+_lock = Lock()
+
+
+def set_parse_cache(
+    max_entries: Optional[int] = None,
+    cache_dir: Optional[str | Path] = None,
+) -> None:
+    """
+    Set the number of parsed files kept in memory, and the folder of the
+    cache on disk. The folder is also passed to subprocesses through the
+    `ESPUMA_PARSE_CACHE` environment variable.
+    """
+    global _max_entries
+
+    if max_entries is not None:
+        if max_entries < 0:
+            raise ValueError(f"max_entries must be at least 0. Got {max_entries}")
+
+        with _lock:
+            _max_entries = max_entries
+            while len(_entries) > _max_entries:
+                _entries.popitem(last=False)
+
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir).expanduser().absolute()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        os.environ["ESPUMA_PARSE_CACHE"] = str(cache_dir)
+
+
+def cached_parse(path: str | Path, parse: Callable[[Path], Any]) -> Any:
+    """
+    `parse(path)`, or its result for the file as it is now if it was
+    parsed before. The result is shared, so it must not be modified.
+    """
+    path = Path(path).absolute()
+    key = (str(path), f"{parse.__module__}.{parse.__qualname__}")
+
+    stat = path.stat()
+    version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    with _lock:
+        cached = _entries.get(key)
+
+        if cached is not None and cached[0] == version:
+            _entries.move_to_end(key)
+            return cached[1]
+
+    pickle_file = _pickle_file(key, version, path)
+    tree = _load(pickle_file)
+
+    if tree is None:
+        tree = parse(path)
+        _dump(pickle_file, tree)
+
+    with _lock:
+        _entries[key] = (version, tree)
+        _entries.move_to_end(key)
+
+        while len(_entries) > _max_entries:
+            _entries.popitem(last=False)
+
+    return tree
+
+
+def invalidate(path: str | Path) -> None:
+    """Drop the parsed `path`, e.g. after writing it"""
+    path = str(Path(path).absolute())
+
+    with _lock:
+        for key in [k for k in _entries if k[0] == path]:
+            del _entries[key]
+
+
+def clear() -> None:
+    """Empty the cache in memory. The cache on disk is left untouched"""
+    with _lock:
+        _entries.clear()
+
+
+def _digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _pickle_file(key: tuple[str, str], version: tuple[int, int, int], path: Path) -> Optional[Path]:
+    cache_dir = os.environ.get("ESPUMA_PARSE_CACHE")
+    if not cache_dir:
+        return None
+
+    ## A file rewritten within the same timestamp tick would look unchanged to
+    ## other processes, so recently modified files are also keyed on content
+    if time.time_ns() - version[0] < _RACY_NS:
+        version = (*version, _digest(path))
+
+    name = hashlib.blake2b(repr((CACHE_VERSION, key, version)).encode(), digest_size=16).hexdigest()
+    return Path(cache_dir) / name[:2] / f"{name}.pickle"
+
+
+def _load(pickle_file: Optional[Path]) -> Any:
+    if pickle_file is None:
+        return None
+
+    try:
+        with open(pickle_file, "rb") as f:
+            return pickle.load(f)
+
+    except FileNotFoundError:
+        return None
+
+    ## Truncated or written by an incompatible version, parsed again
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def _dump(pickle_file: Optional[Path], tree: Any) -> None:
+    if pickle_file is None:
+        return
+
+    pickle_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=pickle_file.parent, prefix=f".{pickle_file.name}.")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(tree, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmp, pickle_file)
+
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
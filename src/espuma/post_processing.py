@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+import os
+import re
+import json
+import tempfile
+import warnings
+
+from pathlib import Path
+from collections.abc import Mapping, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+import xarray as xr
+
+from .base import _open_netcdf, _release_netcdf
+from .foam_parser import parse_file
+from .set_formats import READERS, Set_Reader
+
+## Files of restarted function objects are suffixed with their start time
+_TIME_SUFFIX = re.compile(r"^(.*)_(\d[\d.eE+-]*)$")
+_PROBE = re.compile(r"#\s*Probe\s+(\d+)\s*\(([^)]*)\)")
+_GROUP = re.compile(rb"\([^)]*\)|\S+")
+_COMMENT = re.compile(rb"^#[^\n]*\n?", re.M)
+_WORDS = re.compile(r'[^\s()"]+')
+_INNER_BRACES = re.compile(r"\{[^{}]*\}")
+_SET_NAME = re.compile(r'([^\s(){};"\x00]+)\s*\x00')
+
+
+class Post_Processing(Mapping):
+    """
+    Outputs of the function objects of a case, found in `postProcessing/`.
+
+    Every function object folder is loaded as a single xarray dataset:
+
+    - Tables written over time (`.dat` files of `probes`, `residuals`,
+      `surfaceFieldValue`, `fieldMinMax`...) have a `time` dimension. The
+      folders of each restart are concatenated in time order, with the
+      later restart winning where they overlap.
+    - Sampled sets (`sets`, `sample`, `boundaryProbes`...), written as one
+      folder per time, are stacked along `time`. Files are read with the
+      readers registered in `espuma.set_formats`. The names of the sets
+      and fields are taken from the `sets` and `fields` of the function
+      object, in the `functions` of controlDict or in `system/<name>`.
+
+    >>> case.post_processing["residuals"]["p"].plot()
+
+    Parsed outputs are cached as NetCDF files in
+    `postProcessing/espuma_post_processing` and opened lazily. A cache is
+    parsed again when any of its source files changes.
+    """
+
+    def __init__(self, case_path: str | Path, max_workers: Optional[int] = None) -> None:
+        self.path = Path(case_path).absolute() / "postProcessing"
+        self.path_cache = self.path / "espuma_post_processing"
+        self.max_workers = max_workers
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path})"
+
+    def _repr_html_(self) -> str:
+        return (
+            f"<b>{self.__repr__()}</b><br>"
+            "<ul>\n"
+            + "\n".join(f"<li>{name}</li>" for name in self)
+            + "\n</ul>"
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        if not self.path.exists():
+            return iter([])
+
+        return iter(
+            sorted(
+                d.name
+                for d in self.path.iterdir()
+                if d.is_dir() and not d.name.startswith("espuma_") and _time_folders(d)
+            )
+        )
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name in list(self)
+
+    def __getitem__(self, name: str) -> xr.Dataset:
+        if name not in self:
+            raise KeyError(f"{name} not found in {self.path}")
+
+        folders = _time_folders(self.path / name)
+        sets = _is_sets(folders[0])
+        sources = _sources(self.path, folders)
+
+        nc_file = self.path_cache / f"{name}.nc"
+
+        if nc_file.exists():
+            cached = _open_netcdf(nc_file)
+
+            if cached.attrs.get("espuma_sources") == sources:
+                return cached
+
+            cached.close()
+
+        if sets:
+            function = _function_object(self.path.parent, name)
+            dataset = _read_sets(folders, function, self.max_workers)
+        else:
+            dataset = _read_tables(folders)
+
+        dataset.attrs["espuma_sources"] = sources
+        self._write_cache(nc_file, dataset)
+
+        return _open_netcdf(nc_file)
+
+    def _write_cache(self, nc_file: Path, dataset: xr.Dataset) -> None:
+        self.path_cache.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path_cache, prefix=f".{nc_file.name}.")
+        os.close(fd)
+
+        try:
+            dataset.to_netcdf(tmp, engine="netcdf4")
+            os.replace(tmp, nc_file)
+
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        _release_netcdf(nc_file)
+
+
+def _time_folders(path: Path) -> list[Path]:
+    """Sub-folders named as a time, sorted"""
+    folders = []
+
+    for d in path.iterdir():
+        try:
+            folders.append((float(d.name), d))
+        except ValueError:
+            continue
+
+    return [d for _, d in sorted(folders) if d.is_dir()]
+
+
+def _set_readers() -> dict[str, Set_Reader]:
+    readers = {}
+    for reader in READERS.values():
+        readers.setdefault(reader.suffix, reader)
+
+    return readers
+
+
+def _is_sets(folder: Path) -> bool:
+    suffixes = {f.suffix for f in folder.iterdir() if f.is_file()}
+    return ".dat" not in suffixes and bool(suffixes & set(_set_readers()))
+
+
+def _sources(path: Path, folders: list[Path]) -> str:
+    """Files of the output with their size and modification time, as JSON"""
+    sources = []
+
+    for folder in folders:
+        for f in sorted(folder.iterdir()):
+            if f.is_file():
+                stat = f.stat()
+                sources.append([str(f.relative_to(path)), stat.st_mtime_ns, stat.st_size])
+
+    return json.dumps(sources)
+
+
+def _read_tables(folders: list[Path]) -> xr.Dataset:
+    """
+    Concatenate the tables of every restart folder along time. Where two
+    tables overlap, the rows of the one that started later are kept.
+    """
+    tables = {}
+
+    for folder in folders:
+        for f in folder.iterdir():
+            if not f.is_file() or f.suffix not in ("", ".dat"):
+                continue
+
+            match = _TIME_SUFFIX.match(f.stem)
+            restarted = match and _to_float(match.group(2)) == float(folder.name)
+            name = match.group(1) if restarted else f.stem
+
+            table = _read_table(f)
+            if table.sizes.get("time"):
+                tables.setdefault(name, []).append(table)
+
+    datasets = []
+
+    for name, parts in sorted(tables.items()):
+        parts.sort(key=lambda t: float(t["time"][0]))
+
+        kept = [
+            part.isel(time=part["time"].values < later["time"].values[0])
+            for part, later in zip(parts[:-1], parts[1:])
+        ] + parts[-1:]
+
+        datasets.append(xr.concat(kept, dim="time", data_vars="all"))
+
+    return xr.merge(datasets, join="outer", compat="override")
+
+
+def _read_table(path: Path) -> xr.Dataset:
+    """
+    Read a table written by a function object. The last comment line is
+    taken as the header. Values in parentheses are split in components.
+    Files of `probes` are read as (time, probe).
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+
+    comments = [c.decode().strip() for c in _COMMENT.findall(content)]
+    body = _COMMENT.sub(b"", content).strip()
+
+    probes = [_PROBE.match(c) for c in comments]
+    probes = [p for p in probes if p]
+
+    header = [c for c in comments if not _PROBE.match(c) and c.strip("# ")]
+    header = header[-1].lstrip("#").strip() if header else ""
+    header = header.split("\t") if "\t" in header else header.split()
+    header = [h.strip() for h in header if h.strip()]
+
+    if not body:
+        return xr.Dataset(coords={"time": np.empty(0)})
+
+    groups = _GROUP.findall(body.split(b"\n", 1)[0])
+    n_components = [len(g.strip(b"()").split()) if g.startswith(b"(") else 1 for g in groups]
+    columns = _columns(body, groups, n_components)
+
+    time = columns.pop(0).astype(float)
+
+    if probes:
+        xyz = np.array([np.fromstring(p.group(2), sep=" ") for p in probes])
+        values = np.stack(columns, axis=1)  ## (time, probe[, component])
+
+        data = {}
+        for j, name in enumerate(_component_names(path.stem, n_components[1])):
+            data[name] = (("time", "probe"), values[..., j] if values.ndim > 2 else values)
+
+        return xr.Dataset(
+            data,
+            coords={
+                "time": time,
+                "probe": np.arange(len(probes)),
+                "x": ("probe", xyz[:, 0]),
+                "y": ("probe", xyz[:, 1]),
+                "z": ("probe", xyz[:, 2]),
+            },
+        )
+
+    names = header[1:] if len(header) == len(groups) else [f"{path.stem}_{j}" for j in range(1, len(groups))]
+
+    data = {}
+    for name, n, values in zip(names, n_components[1:], columns):
+        for j, component in enumerate(_component_names(name.replace("/", "_"), n)):
+            data[component] = ("time", values[:, j] if n > 1 else values)
+
+    return xr.Dataset(data, coords={"time": time})
+
+
+def _columns(body: bytes, groups: list[bytes], n_components: list[int]) -> list[np.ndarray]:
+    """Columns of the table, each (row,) or (row, component)"""
+    n_values = sum(n_components)
+    offsets = np.cumsum([0] + n_components)
+
+    ## Fast path, all numbers
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        try:
+            values = np.fromstring(body.replace(b"(", b" ").replace(b")", b" "), sep=" ")
+        except (DeprecationWarning, ValueError):
+            values = None
+
+    n_rows = body.count(b"\n") + 1
+
+    if values is not None and values.size == n_rows * n_values:
+        values = values.reshape(n_rows, n_values)
+        return [
+            values[:, a] if n == 1 else values[:, a:b]
+            for a, b, n in zip(offsets[:-1], offsets[1:], n_components)
+        ]
+
+    ## Text columns or lines cut short while the case runs
+    rows = [_GROUP.findall(line) for line in body.split(b"\n")]
+    rows = [row for row in rows if len(row) == len(groups)]
+
+    columns = []
+    for j, n in enumerate(n_components):
+        tokens = [row[j].decode() for row in rows]
+
+        if n > 1:
+            columns.append(np.array([np.fromstring(t.strip("()"), sep=" ") for t in tokens]))
+            continue
+
+        try:
+            columns.append(np.array(tokens, dtype=float))
+        except ValueError:
+            ## Values not computed yet, as N/A in residuals, are kept as NaN
+            text = {t for t in tokens if np.isnan(_to_float(t))} - {"N/A", "nan"}
+            columns.append(np.array(tokens) if text else np.array([_to_float(t) for t in tokens]))
+
+    return columns
+
+
+def _to_float(token: str) -> float:
+    try:
+        return float(token)
+    except ValueError:
+        return np.nan
+
+
+def _component_names(name: str, n_components: int) -> list[str]:
+    if n_components == 1:
+        return [name]
+
+    return [f"{name}_{j}" for j in range(n_components)]
+
+
+def _function_object(case_path: Path, name: str) -> Mapping:
+    """
+    Dictionary of the function object `name`, from the `functions` of
+    controlDict or from `system/<name>`. Empty if neither is found.
+    """
+    control_dict = case_path / "system/controlDict"
+    functions = parse_file(control_dict).get("functions", {}) if control_dict.is_file() else {}
+
+    if isinstance(functions, Mapping) and isinstance(functions.get(name), Mapping):
+        return functions[name]
+
+    if (case_path / "system" / name).is_file():
+        function = parse_file(case_path / "system" / name)
+        return function[name] if isinstance(function.get(name), Mapping) else function
+
+    return {}
+
+
+def _set_names(sets) -> list[str]:
+    """Names of the sets of a function object, given as a dictionary or a list"""
+    if isinstance(sets, Mapping):
+        return list(sets)
+
+    ## ( name { ... } name { ... } ), each dictionary is replaced by a marker
+    text, n = str(sets), 1
+    while n:
+        text, n = _INNER_BRACES.subn("\x00", text)
+
+    return _SET_NAME.findall(text)
+
+
+def _read_sets(
+    folders: list[Path],
+    function: Mapping,
+    max_workers: Optional[int] = None,
+) -> xr.Dataset:
+    """
+    Stack the sets written at each time. Each set gets its own dimension.
+    Files are named `<set>_<field>_<field>...`, split with the `sets` and
+    `fields` of the `function` object. Without them, names are split on
+    the first underscore.
+    """
+    readers = _set_readers()
+
+    files = sorted(f.name for f in folders[0].iterdir() if f.is_file() and f.suffix in readers)
+    folders = [d for d in folders if all((d / f).exists() for f in files)]
+
+    fields = _WORDS.findall(str(function.get("fields", "")))
+    set_names = sorted(_set_names(function.get("sets", ())), key=len, reverse=True)
+
+    def split(stem: str) -> tuple[str, list[str]]:
+        for set_name in set_names:
+            if stem.startswith(set_name + "_"):
+                return set_name, fields
+
+        set_name, _, rest = stem.partition("_")
+        return set_name, fields or rest.split("_")
+
+    def read(path: Path) -> tuple[list[str], np.ndarray]:
+        return readers[path.suffix].read(path, split(path.stem)[1])
+
+    samples = {f: read(folders[0] / f) for f in files}
+    data = {f: np.empty((len(folders), *values[:, 3:].shape)) for f, (_, values) in samples.items()}
+
+    def read_time(i: int, folder: Path):
+        for f, values in data.items():
+            values[i] = read(folder / f)[1][:, 3:]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(read_time, range(len(folders)), folders))
+
+    ## Prefix with the set name only if a field is sampled on many sets
+    counts = {}
+    for names, _ in samples.values():
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+
+    dataset = xr.Dataset(coords={"time": [float(d.name) for d in folders]})
+
+    for f, (names, values) in samples.items():
+        set_name = split(Path(f).stem)[0]
+
+        for j, name in enumerate(names):
+            variable = name if counts[name] == 1 else f"{set_name}_{name}"
+            dataset[variable] = (("time", set_name), data[f][:, :, j])
+
+        for j, axis in enumerate("xyz"):
+            dataset.coords[f"{set_name}_{axis}"] = (set_name, values[:, j])
+
+    return dataset
@@ -0,0 +1,292 @@
+"""
+Geometries sampled by `Case_Directory.export_to_xarray`.
+
+>>> case.export_to_xarray(
+...     sampling={
+...         "centreline": Line((0.5, 0.5, 0.0), (0.5, 0.5, 1.0), n_points=200),
+...         "wells": Points([(0.1, 0.1, 0.5), (0.9, 0.9, 0.5)]),
+...         "midplane": Plane("z", 0.5, resolution=(50, 50)),
+...     }
+... )
+
+The points of every geometry are located in the mesh once, and the
+weights that interpolate the point data of the mesh to them are kept as a
+sparse matrix, so sampling a time is a matrix product. The matrices are
+saved in `postProcessing/espuma_sampling` and reused while the mesh and
+the points do not change. The folder can be deleted at any time.
+"""
+
+from __future__ import annotations
+
+import os
+import hashlib
+import tempfile
+import zipfile
+
+from pathlib import Path
+from dataclasses import dataclass
+from functools import cached_property
+from typing import ClassVar, Sequence
+
+import numpy as np
+import pyvista as pv
+
+from vtkmodules.vtkCommonDataModel import vtkGenericCell, vtkStaticCellLocator
+
+## Bumped when the saved weights change, so older ones are not loaded
+CACHE_VERSION = 1
+
+## Points closer to a cell than this fraction of the mesh size are taken as in it
+TOLERANCE = 1e-6
+
+_AXES = {"x": 0, "y": 1, "z": 2}
+
+
+@dataclass(slots=True, frozen=True)
+class Line:
+    """`n_points` evenly spaced from `start` to `end`, along `distance`"""
+
+    start: tuple[float, float, float]
+    end: tuple[float, float, float]
+    n_points: int = 100
+
+    dimension: ClassVar[str] = "distance"
+
+    def points(self, bounds: Sequence[float]) -> np.ndarray:
+        return np.linspace(self.start, self.end, self.n_points)
+
+    def coordinate(self, points: np.ndarray) -> np.ndarray:
+        return np.linalg.norm(points - np.asarray(self.start, dtype=float), axis=1)
+
+
+@dataclass(slots=True, frozen=True)
+class Points:
+    """A set of points, along `point`"""
+
+    xyz: tuple[tuple[float, float, float], ...]
+
+    dimension: ClassVar[str] = "point"
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "xyz", tuple(tuple(map(float, p)) for p in self.xyz))
+
+    def points(self, bounds: Sequence[float]) -> np.ndarray:
+        return np.array(self.xyz, dtype=float).reshape(-1, 3)
+
+    def coordinate(self, points: np.ndarray) -> np.ndarray:
+        return np.arange(len(points))
+
+
+@dataclass(slots=True, frozen=True)
+class Plane:
+    """
+    Regular grid of `resolution` points over the mesh bounds, on the plane
+    normal to the axis `normal` at `position`, along `point`. The grid is
+    ordered with the first of the other two axes changing fastest.
+    """
+
+    normal: str
+    position: float
+    resolution: tuple[int, int] = (100, 100)
+
+    dimension: ClassVar[str] = "point"
+
+    def __post_init__(self) -> None:
+        if self.normal not in _AXES:
+            raise ValueError(f"normal must be one of {list(_AXES)}. Got {self.normal}")
+
+    def points(self, bounds: Sequence[float]) -> np.ndarray:
+        normal = _AXES[self.normal]
+        first, second = [axis for axis in range(3) if axis != normal]
+
+        a = np.linspace(bounds[2 * first], bounds[2 * first + 1], self.resolution[0])
+        b = np.linspace(bounds[2 * second], bounds[2 * second + 1], self.resolution[1])
+        a, b = np.meshgrid(a, b)
+
+        points = np.empty((a.size, 3))
+        points[:, normal] = self.position
+        points[:, first] = a.ravel()
+        points[:, second] = b.ravel()
+
+        return points
+
+    def coordinate(self, points: np.ndarray) -> np.ndarray:
+        return np.arange(len(points))
+
+
+Sample = Line | Points | Plane
+
+
+class Interpolation:
+    """
+    Sparse (n_points, n_mesh_points) matrix of the weights that interpolate
+    the point data of a mesh to a set of points, as `vtkProbeFilter` does,
+    stored as CSR arrays. Points outside the mesh have an empty row and are
+    NaN after interpolation.
+
+    The matrix is applied with `scipy.sparse` if it is installed, and with
+    NumPy otherwise.
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        indices: np.ndarray,
+        indptr: np.ndarray,
+        n_mesh_points: int,
+    ) -> None:
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.n_mesh_points = int(n_mesh_points)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.n_points} points, {self.n_mesh_points} mesh points)"
+
+    @property
+    def n_points(self) -> int:
+        return len(self.indptr) - 1
+
+    @cached_property
+    def found(self) -> np.ndarray:
+        """Whether each point is in the mesh"""
+        return np.diff(self.indptr) > 0
+
+    @cached_property
+    def _rows(self) -> np.ndarray:
+        return np.repeat(np.arange(self.n_points), np.diff(self.indptr))
+
+    @cached_property
+    def _matrix(self):
+        try:
+            from scipy.sparse import csr_matrix
+
+        except ImportError:
+            return None
+
+        return csr_matrix((self.data, self.indices, self.indptr), shape=(self.n_points, self.n_mesh_points))
+
+    @classmethod
+    def locate(cls, mesh: pv.DataSet, points: np.ndarray) -> Interpolation:
+        """Find the cell of `mesh` holding each point, with a cell locator"""
+        locator = vtkStaticCellLocator()
+        locator.SetDataSet(mesh)
+        locator.BuildLocator()
+
+        cell = vtkGenericCell()
+        pcoords = [0.0, 0.0, 0.0]
+        cell_weights = [0.0] * max(mesh.GetMaxCellSize(), 1)
+        tol2 = (TOLERANCE * mesh.length) ** 2
+
+        data, indices, indptr = [], [], [0]
+
+        for point in points:
+            if locator.FindCell(list(point), tol2, cell, pcoords, cell_weights) >= 0:
+                ## Not written by FindCell for points found within the tolerance
+                cell.InterpolateFunctions(pcoords, cell_weights)
+
+                point_ids = cell.GetPointIds()
+                n = cell.GetNumberOfPoints()
+                indices.extend(point_ids.GetId(j) for j in range(n))
+                data.extend(cell_weights[:n])
+
+            indptr.append(len(indices))
+
+        return cls(
+            np.array(data, dtype=float),
+            np.array(indices, dtype=np.int64),
+            np.array(indptr, dtype=np.int64),
+            mesh.n_points,
+        )
+
+    @classmethod
+    def cached(cls, mesh: pv.DataSet, points: np.ndarray, cache_dir: Path) -> Interpolation:
+        """
+        `locate`, or the weights saved in `cache_dir` by an earlier call for
+        the same points and a mesh with the same points and cell connectivity
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((CACHE_VERSION, TOLERANCE, mesh.n_points, mesh.n_cells)).encode())
+        digest.update(np.ascontiguousarray(mesh.points, dtype=float).tobytes())
+        for array in _cell_connectivity(mesh):
+            digest.update(array.tobytes())
+        digest.update(np.ascontiguousarray(points, dtype=float).tobytes())
+        cache_file = Path(cache_dir) / f"{digest.hexdigest()}.npz"
+
+        try:
+            with np.load(cache_file) as saved:
+                return cls(saved["data"], saved["indices"], saved["indptr"], saved["n_mesh_points"])
+
+        except (FileNotFoundError, KeyError, ValueError, zipfile.BadZipFile):
+            pass
+
+        interpolation = cls.locate(mesh, points)
+
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_file.parent, prefix=f".{cache_file.name}.")
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    data=interpolation.data,
+                    indices=interpolation.indices,
+                    indptr=interpolation.indptr,
+                    n_mesh_points=interpolation.n_mesh_points,
+                )
+
+            os.replace(tmp, cache_file)
+
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        return interpolation
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        """(n_mesh_points[, components]) values at the points"""
+        values = np.asarray(values, dtype=float)
+
+        if values.shape[0] != self.n_mesh_points:
+            raise ValueError(f"Expected values for {self.n_mesh_points} mesh points. Got {values.shape[0]}")
+
+        if self._matrix is not None:
+            sampled = np.asarray(self._matrix @ values)
+
+        else:
+            weighted = (self.data[:, None] * values[self.indices].reshape(len(self.indices), -1)).T
+            sampled = np.stack([np.bincount(self._rows, w, self.n_points) for w in weighted], axis=-1)
+            sampled = sampled.reshape(self.n_points, *values.shape[1:])
+
+        sampled[~self.found] = np.nan
+        return sampled
+
+    def __call__(self, mesh: pv.DataSet) -> dict[str, np.ndarray]:
+        """
+        Point data of `mesh` at the points, with components as
+        `<name>_<j>`
+        """
+        flat = {}
+
+        for name in mesh.point_data.keys():
+            if "vtk" in name:
+                continue
+
+            values = self.apply(mesh.point_data[name])
+
+            if values.ndim > 1:
+                for j in range(values.shape[1]):
+                    flat[f"{name}_{j}"] = values[:, j]
+            else:
+                flat[name] = values
+
+        return flat
+
+
+def _cell_connectivity(mesh: pv.DataSet) -> list[np.ndarray]:
+    """Types of the cells, offsets of each in the connectivity, and point ids"""
+    if not isinstance(mesh, pv.UnstructuredGrid):
+        mesh = mesh.cast_to_unstructured_grid()
+
+    offsets = pv.convert_array(mesh.GetCells().GetOffsetsArray())
+    return [np.ascontiguousarray(a, dtype=np.int64) for a in (mesh.celltypes, offsets, mesh.cell_connectivity)]
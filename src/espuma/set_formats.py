@@ -0,0 +1,211 @@
+"""
+Readers for the files written by OpenFOAM's sampled sets, keyed on the
+`setFormat` of the function object.
+
+Every reader takes the path of a file and the names of the sampled fields,
+and returns the names of the columns after x, y and z, and the values as a
+(point, column) array. Components of vectors and tensors are named
+`<field>_<j>`, the same in every format.
+
+New formats can be added with `register_reader`:
+
+>>> @register_reader("gnuplot", suffix=".gplt")
+... def read_gnuplot(path, fields):
+...     ...
+"""
+
+from __future__ import annotations
+
+import re
+
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+
+@dataclass(slots=True, frozen=True)
+class Set_Reader:
+    read: Callable[[Path, list[str]], tuple[list[str], np.ndarray]]
+    suffix: str
+
+
+READERS: dict[str, Set_Reader] = {}
+
+
+def register_reader(*formats: str, suffix: str):
+    """Register the decorated function as the reader of files ending in `suffix`"""
+
+    def decorator(read):
+        for set_format in formats:
+            READERS[set_format] = Set_Reader(read, suffix)
+
+        return read
+
+    return decorator
+
+
+def get_reader(set_format: str) -> Set_Reader:
+    try:
+        return READERS[set_format]
+
+    except KeyError:
+        raise NotImplementedError(
+            f"setFormat {set_format} is not supported. Supported formats are {list(READERS)}"
+        )
+
+
+@register_reader("csv", suffix=".csv")
+def read_csv(path: Path, fields: list[str]) -> tuple[list[str], np.ndarray]:
+    with open(path, "rb") as f:
+        header = f.readline().decode().strip().split(",")
+        values = np.fromstring(f.read().replace(b",", b" "), sep=" ")
+
+    return header[3:], values.reshape(-1, len(header))
+
+
+@register_reader("raw", "xy", suffix=".xy")
+def read_raw(path: Path, fields: list[str]) -> tuple[list[str], np.ndarray]:
+    """Whitespace separated columns, with an optional `#` commented header"""
+    with open(path, "rb") as f:
+        content = f.read()
+
+    header = []
+    while content.startswith(b"#"):
+        line, _, content = content.partition(b"\n")
+        header = line.lstrip(b"#").decode().split()
+
+    n_columns = len(content.split(b"\n", 1)[0].split())
+    values = np.fromstring(content, sep=" ").reshape(-1, n_columns)
+
+    if len(header) == n_columns:
+        return header[3:], values
+
+    return _names_from_file(path, fields, n_columns - 3), values
+
+
+## Legacy VTK data types and their size in bytes
+VTK_TYPES = {
+    "float": "f4",
+    "double": "f8",
+    "int": "i4",
+    "long": "i8",
+    "vtktypeint32": "i4",
+    "vtktypeint64": "i8",
+    "vtkidtype": "i8",
+}
+
+_VTK_LINE = re.compile(rb"\s*([^\n]*)\n?")
+_VTK_KEYWORD = re.compile(rb"\n\s*[A-Za-z_]")
+
+
+@register_reader("vtk", suffix=".vtk")
+def read_vtk(path: Path, fields: list[str]) -> tuple[list[str], np.ndarray]:
+    """Legacy polydata written by the vtk set writer, ascii or binary"""
+    with open(path, "rb") as f:
+        content = f.read()
+
+    lines = content.split(b"\n", 4)
+    binary = lines[2].strip().upper() == b"BINARY"
+    pos = len(b"\n".join(lines[:4])) + 1
+
+    def next_line():
+        nonlocal pos
+        match = _VTK_LINE.match(content, pos)
+        pos = match.end()
+        return match.group(1).decode().split()
+
+    def read(count: int, vtk_type: str) -> np.ndarray:
+        nonlocal pos
+        if binary:
+            dtype = np.dtype(VTK_TYPES[vtk_type.lower()]).newbyteorder(">")
+            values = np.frombuffer(content, dtype, count, offset=pos)
+            pos += values.nbytes
+            return values.astype(float)
+
+        match = _VTK_KEYWORD.search(content, pos)
+        end = match.start() if match else len(content)
+        values = np.fromstring(content[pos:end], sep=" ")
+        pos = end
+
+        if values.size != count:
+            raise ValueError(f"Expected {count} values in {path}. Got {values.size}")
+
+        return values
+
+    xyz = None
+    names, columns = [], []
+
+    while pos < len(content):
+        line = next_line()
+
+        if not line:
+            continue
+
+        keyword = line[0].upper()
+
+        if keyword == "POINTS":
+            xyz = read(3 * int(line[1]), line[2]).reshape(-1, 3)
+
+        elif keyword in ("VERTICES", "LINES", "POLYGONS"):
+            if content.startswith(b"OFFSETS", _VTK_LINE.match(content, pos).start(1)):
+                for count in (int(line[1]), int(line[2])):  ## Offsets and connectivity
+                    read(count, next_line()[1])
+            else:
+                read(int(line[2]), "int")
+
+        elif keyword == "FIELD":
+            for _ in range(int(line[2])):
+                name, n_components, n_tuples, vtk_type = next_line()[:4]
+                values = read(int(n_components) * int(n_tuples), vtk_type)
+                names += _component_names(name, int(n_components))
+                columns.append(values.reshape(int(n_tuples), -1))
+
+        elif keyword in ("SCALARS", "VECTORS"):
+            n_components = 3 if keyword == "VECTORS" else int(line[3]) if len(line) > 3 else 1
+            if keyword == "SCALARS":
+                next_line()  ## LOOKUP_TABLE
+            values = read(n_components * len(xyz), line[2])
+            names += _component_names(line[1], n_components)
+            columns.append(values.reshape(len(xyz), -1))
+
+        elif keyword == "CELL_DATA":
+            break
+
+    if xyz is None:
+        raise ValueError(f"No POINTS found in {path}")
+
+    return names, np.hstack([xyz, *columns])
+
+
+def _component_names(name: str, n_components: int) -> list[str]:
+    if n_components == 1:
+        return [name]
+
+    return [f"{name}_{j}" for j in range(n_components)]
+
+
+def _names_from_file(path: Path, fields: list[str], n_values: int) -> list[str]:
+    """
+    Files without a header are named `<set>_<field>_<field>...`, with fields
+    of the same type. The fields are taken from the end of the name.
+    """
+    stem = path.stem
+    found = []
+
+    for _ in range(len(fields)):
+        field = max(
+            (f for f in fields if stem.endswith("_" + f)), key=len, default=None
+        )
+        if field is None:
+            break
+
+        found.insert(0, field)
+        stem = stem.removesuffix("_" + field)
+
+    if not found or n_values % len(found):
+        raise ValueError(f"Could not match the columns of {path} to the fields {fields}")
+
+    n_components = n_values // len(found)
+    return [name for field in found for name in _component_names(field, n_components)]
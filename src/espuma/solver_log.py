@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import re
+import subprocess
+
+from pathlib import Path
+from threading import Thread
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+import xarray as xr
+
+## Lines of stderr kept for the error message of a failed run
+STDERR_LINES = 200
+
+_NUMBER = r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|nan|inf)"
+_TIME = re.compile(rf"^Time = {_NUMBER}")
+_DELTA_T = re.compile(rf"^deltaT = {_NUMBER}")
+_COURANT = re.compile(rf"^Courant Number mean: {_NUMBER} max: {_NUMBER}")
+_SOLVING = re.compile(
+    rf"Solving for (\w+), Initial residual = {_NUMBER}, "
+    rf"Final residual = {_NUMBER}, No Iterations (\d+)"
+)
+_EXECUTION = re.compile(rf"^ExecutionTime = {_NUMBER} s\s+ClockTime = {_NUMBER} s")
+
+
+@dataclass(slots=True, frozen=True)
+class Time_Step:
+    """What the solver reported for one time step"""
+
+    time: float
+    delta_t: float = np.nan
+    courant_mean: float = np.nan
+    courant_max: float = np.nan
+    execution_time: float = np.nan
+    clock_time: float = np.nan
+    ## Initial residual of the first solve, final residual of the last one
+    initial_residuals: dict[str, float] = field(default_factory=dict)
+    final_residuals: dict[str, float] = field(default_factory=dict)
+    iterations: dict[str, int] = field(default_factory=dict)
+
+
+class Solver_Log:
+    """
+    Parse the log of an OpenFOAM solver line by line into a time series
+    of residuals, Courant numbers and execution times.
+
+    >>> log = Solver_Log.from_file("log.scalarTransportFoam")
+    >>> log.to_xarray()["T_initial"].plot()
+    """
+
+    def __init__(self) -> None:
+        self.steps: list[Time_Step] = []
+        self.finished = False
+        self._current: Optional[dict] = None
+
+        ## Transient solvers report the Courant number and deltaT before the time
+        self._pending: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} steps)"
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> Solver_Log:
+        log = cls()
+
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                log.feed(line)
+
+        log.flush()
+        return log
+
+    def feed(self, line: str) -> Optional[Time_Step]:
+        """Parse a line. Returns the time step it completes, if any"""
+        line = line.strip()
+
+        if match := _TIME.match(line):
+            step = self.flush()
+            self._current = {
+                "time": float(match.group(1)),
+                "initial_residuals": {},
+                "final_residuals": {},
+                "iterations": {},
+                **self._pending,
+            }
+            self._pending = {}
+            return step
+
+        if line == "End":
+            self.finished = True
+            return self.flush()
+
+        current = self._pending if self._current is None else self._current
+
+        if match := _COURANT.match(line):
+            current["courant_mean"] = float(match.group(1))
+            current["courant_max"] = float(match.group(2))
+
+        elif match := _DELTA_T.match(line):
+            current["delta_t"] = float(match.group(1))
+
+        elif self._current is None:
+            return None
+
+        elif match := _SOLVING.search(line):
+            name, initial, final, iterations = match.groups()
+            self._current["initial_residuals"].setdefault(name, float(initial))
+            self._current["final_residuals"][name] = float(final)
+            self._current["iterations"][name] = (
+                self._current["iterations"].get(name, 0) + int(iterations)
+            )
+
+        elif match := _EXECUTION.match(line):
+            self._current["execution_time"] = float(match.group(1))
+            self._current["clock_time"] = float(match.group(2))
+            return self.flush()
+
+        return None
+
+    def flush(self) -> Optional[Time_Step]:
+        """Close the time step being parsed"""
+        if self._current is None:
+            return None
+
+        step = Time_Step(**self._current)
+        self.steps.append(step)
+        self._current = None
+
+        return step
+
+    def to_xarray(self) -> xr.Dataset:
+        """
+        Time series with `<field>_initial`, `<field>_final` and
+        `<field>_iterations` for every solved field. Fields that were not
+        solved in a step are NaN.
+        """
+        data = {
+            name: ("time", np.array([getattr(s, name) for s in self.steps], dtype=float))
+            for name in ("delta_t", "courant_mean", "courant_max", "execution_time", "clock_time")
+        }
+
+        for attribute, suffix in (
+            ("initial_residuals", "initial"),
+            ("final_residuals", "final"),
+            ("iterations", "iterations"),
+        ):
+            names = dict.fromkeys(n for s in self.steps for n in getattr(s, attribute))
+
+            for name in names:
+                values = [getattr(s, attribute).get(name, np.nan) for s in self.steps]
+                data[f"{name}_{suffix}"] = ("time", np.array(values, dtype=float))
+
+        return xr.Dataset(data, coords={"time": [s.time for s in self.steps]})
+
+
+class Solver_Run:
+    """
+    A solver running in the background. Iterating over it yields every
+    time step as the solver reports it.
+
+    Parameters
+    ----------
+    command : list[str]
+        Command to run.
+    cwd : Path
+        Case directory.
+    log_file : Path, optional
+        Copy of the solver output.
+    callbacks : list of callables
+        Called with every `Time_Step`. The solver is killed if any of
+        them returns False.
+
+    >>> with case.start_solver(log_file="log") as solver:
+    ...     for step in solver:
+    ...         if step.courant_max > 10:
+    ...             solver.kill()
+    """
+
+    def __init__(
+        self,
+        command: list[str],
+        cwd: Path,
+        log_file: Optional[str | Path] = None,
+        callbacks: tuple[Callable[[Time_Step], Optional[bool]], ...] = (),
+    ) -> None:
+        self.command = command
+        self.log = Solver_Log()
+        self.callbacks = list(callbacks)
+        self.killed = False
+
+        self._log_file = open(Path(cwd) / log_file, "w") if log_file else None
+        self._stderr = deque(maxlen=STDERR_LINES)
+
+        self.process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+
+        ## Drained in the background so a chatty stderr cannot block the solver
+        self._stderr_thread = Thread(target=self._stderr.extend, args=(self.process.stderr,), daemon=True)
+        self._stderr_thread.start()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({' '.join(self.command)}, {len(self.log)} steps)"
+
+    def __enter__(self) -> Solver_Run:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.process.poll() is None:
+            self.kill()
+
+        self._close()
+
+    def __iter__(self) -> Iterator[Time_Step]:
+        for line in self.process.stdout:
+            if self._log_file:
+                self._log_file.write(line)
+
+            step = self.log.feed(line)
+
+            if step is not None:
+                yield step
+
+                if any(callback(step) is False for callback in self.callbacks):
+                    self.kill()
+
+        ## The last step ends with the output, when there is no solver left to kill
+        if (step := self.log.flush()) is not None:
+            yield step
+
+            for callback in self.callbacks:
+                if callback(step) is False:
+                    break
+
+    @property
+    def stderr(self) -> str:
+        """Last lines of stderr"""
+        return "".join(self._stderr)
+
+    def kill(self) -> None:
+        self.killed = True
+        self.process.kill()
+
+    def wait(self) -> Solver_Log:
+        """
+        Consume the output until the solver exits. Raises OSError if it
+        failed, unless it was killed.
+        """
+        for _ in self:
+            pass
+
+        returncode = self.process.wait()
+        self._close()
+
+        if returncode != 0 and not self.killed:
+            raise OSError(" ".join(self.command) + "\n\n" + self.stderr.strip())
+
+        return self.log
+
+    def _close(self) -> None:
+        self._stderr_thread.join()
+        self.process.stdout.close()
+        self.process.stderr.close()
+
+        if self._log_file:
+            self._log_file.close()
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import os
+import json
+import signal
+
+from pathlib import Path
+from itertools import product
+from collections import defaultdict
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Optional
+
+import xarray as xr
+
+from .base import Case_Directory, atomic_open
+
+## Steps that can be run on each case, in the order they are given
+STEPS = {
+    "blockMesh": "_blockMesh",
+    "setFields": "_setFields",
+    "run": "_runCase",
+    "export": "export_to_xarray",
+}
+
+PENDING, RUNNING, FINISHED, FAILED = "pending", "running", "finished", "failed"
+
+
+class Sweep:
+    """
+    Run many variants of a template case on a pool of processes.
+
+    Parameters are addressed as `<directory>.<file>.<entry>`, for example
+    `constant.transportProperties.DT` or `system.controlDict.endTime`.
+    The directory is one of `zero`, `constant` or `system`.
+
+    >>> sweep = Sweep(template, "runs", {"system.controlDict.endTime": [0.1, 0.2]})
+    >>> sweep.run()
+    >>> results = sweep.to_xarray()
+
+    The state of every case is kept in `<path>/sweep.json`, so an
+    interrupted sweep resumes from the cases that did not finish.
+    """
+
+    def __init__(
+        self,
+        template: Case_Directory,
+        path: str | Path,
+        parameters: Mapping[str, Sequence] | Sequence[Mapping[str, Any]],
+        steps: Sequence[str] = ("blockMesh", "run"),
+        max_workers: Optional[int] = None,
+    ) -> None:
+        if not isinstance(template, Case_Directory):
+            raise TypeError(f"{template} must be a espuma.Case_Directory object")
+
+        unknown = [step for step in steps if step not in STEPS]
+        if unknown:
+            raise ValueError(f"Unknown steps {unknown}. Valid steps are {list(STEPS)}")
+
+        self.template = template
+        self.path = Path(path).absolute()
+        self.steps = list(steps)
+        self.max_workers = max_workers or os.cpu_count()
+
+        self.variants = _expand_grid(parameters)
+        for variant in self.variants:
+            for address in variant:
+                _split_address(address)
+
+        self._status = self._load_status()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path}, {len(self.variants)} cases)"
+
+    def _repr_html_(self) -> str:
+        counts = defaultdict(int)
+        for state in self.status.values():
+            counts[state] += 1
+
+        return (
+            f"<b>{self.__repr__()}</b><br>"
+            "<dl>\n"
+            + "<dt><i>Template:</i></dt>\n"
+            + f"<dd>{self.template.path}</dd>\n"
+            + "<dt><i>Status:</i></dt>\n"
+            + "<dd>"
+            + ", ".join(f"{n} {state}" for state, n in counts.items())
+            + "</dd>\n</dl>"
+        )
+
+    @property
+    def names(self) -> list[str]:
+        return [f"case_{i:04d}" for i in range(len(self.variants))]
+
+    @property
+    def status(self) -> dict[str, str]:
+        return {name: self._status[name]["status"] for name in self.names}
+
+    @property
+    def cases(self) -> list[Case_Directory]:
+        """Cases that finished all the steps"""
+        return [
+            Case_Directory(self.path / name)
+            for name, state in self.status.items()
+            if state == FINISHED
+        ]
+
+    def run(self, rerun_failed: bool = True, verbose: bool = False) -> dict[str, str]:
+        """
+        Clone, configure and run every case that has not finished yet.
+        Returns the status of each case.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        pending = [
+            (name, variant)
+            for name, variant in zip(self.names, self.variants)
+            if self._status[name]["status"] in (PENDING, RUNNING)
+            or (rerun_failed and self._status[name]["status"] == FAILED)
+        ]
+
+        pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+        futures = {}
+
+        try:
+            for name, variant in pending:
+                future = pool.submit(
+                    _run_variant, self.template.path, self.path / name, variant, self.steps
+                )
+                futures[future] = name
+                self._status[name].update(status=RUNNING, error=None)
+
+            self._save_status()
+
+            for future in as_completed(futures):
+                name = futures[future]
+                error = future.exception()
+
+                if error is None:
+                    self._status[name].update(status=FINISHED, error=None)
+                else:
+                    self._status[name].update(status=FAILED, error=str(error))
+
+                self._save_status()
+
+                if verbose:
+                    print(f"{name} {self._status[name]['status']}")
+
+        finally:
+            for future in futures:
+                future.cancel()
+
+            ## Interrupted: the workers stop their solvers and exit before the
+            ## cases are marked pending, so a resume does not clone over them
+            if any(not future.done() for future in futures):
+                for process in list((pool._processes or {}).values()):
+                    process.terminate()
+
+            pool.shutdown(wait=True, cancel_futures=True)
+
+            ## Cases that were interrupted are picked up again on resume
+            for name in futures.values():
+                if self._status[name]["status"] == RUNNING:
+                    self._status[name]["status"] = PENDING
+            self._save_status()
+
+        return self.status
+
+    def to_xarray(self, **export_kwargs) -> xr.Dataset | dict[str, xr.Dataset]:
+        """
+        Combine `export_to_xarray` of the finished cases in a single
+        dataset with a `case` dimension. Parameters are added as
+        coordinates along `case`. Cases with different times are aligned
+        on the union of their times, NaN where a case has no value.
+
+        With `sampling=`, a dataset is combined per geometry, as returned
+        by `export_to_xarray`.
+        """
+        names = [name for name, state in self.status.items() if state == FINISHED]
+
+        if not names:
+            raise ValueError("No case has finished yet")
+
+        datasets = [
+            Case_Directory(self.path / name).export_to_xarray(**export_kwargs) for name in names
+        ]
+
+        if not isinstance(datasets[0], xr.Dataset):
+            return {geometry: self._combine(names, [d[geometry] for d in datasets]) for geometry in datasets[0]}
+
+        return self._combine(names, datasets)
+
+    def _combine(self, names: list[str], datasets: list[xr.Dataset]) -> xr.Dataset:
+        combined = xr.concat(datasets, dim="case", join="outer").assign_coords(case=names)
+
+        variants = [self._status[name]["parameters"] for name in names]
+        for address in variants[0]:
+            combined = combined.assign_coords(
+                {address: ("case", [variant[address] for variant in variants])}
+            )
+
+        return combined
+
+    def _load_status(self) -> dict[str, dict]:
+        status_file = self.path / "sweep.json"
+
+        if status_file.exists():
+            with open(status_file) as f:
+                status = json.load(f)["cases"]
+
+            for name, variant in zip(self.names, self.variants):
+                if name in status and status[name]["parameters"] != variant:
+                    raise ValueError(
+                        f"{status_file} was created with different parameters for {name}.\n"
+                        "Use a new path for a different sweep."
+                    )
+        else:
+            status = {}
+
+        for name, variant in zip(self.names, self.variants):
+            status.setdefault(name, {"parameters": variant, "status": PENDING, "error": None})
+
+        return status
+
+    def _save_status(self) -> None:
+        content = {"template": str(self.template.path), "steps": self.steps, "cases": self._status}
+
+        with atomic_open(self.path / "sweep.json") as f:
+            f.write(json.dumps(content, indent=2).encode())
+
+
+def _expand_grid(parameters: Mapping[str, Sequence] | Sequence[Mapping[str, Any]]) -> list[dict]:
+    """A mapping of sequences is expanded as a grid, a sequence of mappings is used as is"""
+    if isinstance(parameters, Mapping):
+        addresses = list(parameters)
+        variants = [dict(zip(addresses, values)) for values in product(*parameters.values())]
+    else:
+        variants = [dict(variant) for variant in parameters]
+
+    ## Same types as stored in sweep.json, so resumed sweeps compare equal
+    return json.loads(json.dumps(variants))
+
+
+def _split_address(address: str) -> tuple[str, str, str]:
+    try:
+        directory, file, entry = address.split(".", maxsplit=2)
+
+    except ValueError:
+        raise ValueError(f"'{address}' is not of the form <directory>.<file>.<entry>")
+
+    if directory not in ("zero", "constant", "system"):
+        raise ValueError(f"'{directory}' in '{address}' must be zero, constant or system")
+
+    return directory, file, entry
+
+
+def _init_worker() -> None:
+    ## Terminating a worker unwinds the running step, which kills its process
+    signal.signal(signal.SIGTERM, _interrupt)
+
+
+def _interrupt(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def _run_variant(
+    template_path: Path,
+    case_path: Path,
+    parameters: dict[str, Any],
+    steps: list[str],
+) -> None:
+    """Worker: clone the template, set the parameters and run the steps"""
+    template = Case_Directory(template_path)
+    case = Case_Directory.clone_from_template(template, case_path, overwrite=True)
+
+    ## Group the changes so every file is written once
+    changes = defaultdict(dict)
+    for address, value in parameters.items():
+        directory, file, entry = _split_address(address)
+        changes[directory, file][entry] = value
+
+    for (directory, file), entries in changes.items():
+        with getattr(getattr(case, directory), file).edit() as d:
+            for entry, value in entries.items():
+                d[entry] = value
+
+    for step in steps:
+        getattr(case, STEPS[step])()
+
+
+def main():
+    pass
+
+
+if __name__ == "__main__":
+    main()
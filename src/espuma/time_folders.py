@@ -0,0 +1,225 @@
+"""
+Time folders of a case, found by scanning the case directory instead of
+calling `foamListTimes`.
+
+A scan is cached on the modification time of the scanned directory, which
+changes whenever a time folder is created, renamed or deleted. Watching
+many running cases with `Time_Watcher` avoids scanning at all: the kernel
+reports every new time folder as it is created (Linux only).
+
+>>> with Time_Watcher(case.path for case in cases) as watcher:
+...     for path, time in watcher:
+...         print(path.name, time)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+## Same as OpenFOAM's Time::isTime, without Python's "inf", "nan" or "1_0"
+_TIME = re.compile(r"^[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?$")
+
+## A directory modified this recently could still change within the same
+## timestamp tick, so its scan is not cached
+_RACY_NS = 2_000_000_000
+
+_scans: dict[str, tuple[int, tuple[str, ...]]] = {}
+
+
+def is_time(name: str) -> bool:
+    return _TIME.match(name) is not None
+
+
+def scan_times(path: str | Path) -> list[str]:
+    """
+    Names of the time folders in `path`, sorted by time. The scan is
+    reused until the directory is modified.
+    """
+    path = os.fspath(path)
+    mtime = os.stat(path).st_mtime_ns
+
+    cached = _scans.get(path)
+    if cached is not None and cached[0] == mtime:
+        return list(cached[1])
+
+    with os.scandir(path) as entries:
+        names = tuple(
+            sorted(
+                (e.name for e in entries if is_time(e.name) and e.is_dir()),
+                key=float,
+            )
+        )
+
+    if time.time_ns() - mtime > _RACY_NS:
+        _scans[path] = (mtime, names)
+
+    return list(names)
+
+
+## inotify(7)
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_EVENT = struct.Struct("iIII")
+
+
+class Time_Watcher:
+    """
+    Report the time folders created in cases, and in their `processor0`
+    folder if they run in parallel, as `(case path, time)` pairs.
+
+    Times already written when a case is added are not reported. Each
+    time is reported once per case, even if it is written by every
+    processor and then reconstructed.
+
+    Parameters
+    ----------
+    paths : iterable of str | Path
+        Case directories to watch. More can be added with `add`.
+
+    Raises
+    ------
+    OSError
+        If inotify is not available, as on macOS or Windows.
+    """
+
+    def __init__(self, paths: Iterable[str | Path] = ()) -> None:
+        library = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(library, use_errno=True)
+
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("Time_Watcher needs inotify, which is only available on Linux")
+
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1: {os.strerror(errno)}")
+
+        ## Watch descriptor -> (case path, watched folder)
+        self._watches: dict[int, tuple[Path, Path]] = {}
+        self._known: dict[Path, set[float]] = {}
+
+        for path in paths:
+            self.add(path)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self._known)} cases)"
+
+    def __enter__(self) -> Time_Watcher:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[tuple[Path, float]]:
+        """Block and yield every new time"""
+        while self._fd >= 0:
+            yield from self.poll(timeout=None)
+
+    def add(self, path: str | Path) -> None:
+        case = Path(path).absolute()
+        if case in self._known:
+            return
+
+        ## Times written before the watch started are not reported
+        self._known[case] = {float(t) for t in self._watch(case, case)}
+
+        if (case / "processor0").is_dir():
+            self._known[case].update(float(t) for t in self._watch(case, case / "processor0"))
+
+    def poll(self, timeout: Optional[float] = 0.0) -> list[tuple[Path, float]]:
+        """
+        New times since the last call, waiting up to `timeout` seconds for
+        one. `None` waits forever.
+        """
+        if self._fd < 0:
+            raise ValueError("Time_Watcher is closed")
+
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+
+        new = []
+
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = _EVENT.unpack_from(buffer, offset)
+                name = buffer[offset + _EVENT.size : offset + _EVENT.size + length]
+                offset += _EVENT.size + length
+
+                if mask & _IN_Q_OVERFLOW:
+                    new += self._rescan()
+
+                elif mask & _IN_IGNORED:
+                    self._watches.pop(wd, None)
+
+                elif mask & _IN_ISDIR and wd in self._watches:
+                    new += self._created(*self._watches[wd], name.rstrip(b"\0").decode())
+
+        return new
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watch(self, case: Path, folder: Path) -> list[str]:
+        """Watch `folder` and return the times it already holds"""
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(folder), _IN_CREATE | _IN_MOVED_TO | _IN_ONLYDIR
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch {folder}: {os.strerror(errno)}")
+
+        self._watches[wd] = (case, folder)
+
+        return scan_times(folder)
+
+    def _created(self, case: Path, folder: Path, name: str) -> list[tuple[Path, float]]:
+        if folder == case and name == "processor0":
+            ## Times may be written before the watch is in place
+            return [
+                new
+                for t in self._watch(case, folder / name)
+                for new in self._created(case, folder / name, t)
+            ]
+
+        if not is_time(name) or float(name) in self._known[case]:
+            return []
+
+        self._known[case].add(float(name))
+        return [(case, float(name))]
+
+    def _rescan(self) -> list[tuple[Path, float]]:
+        """Events were dropped, compare with the folders instead"""
+        new = []
+        watched = set(self._watches.values())
+
+        for case in self._known:
+            if (case, case / "processor0") not in watched and (case / "processor0").is_dir():
+                new += self._created(case, case, "processor0")
+
+        for case, folder in watched:
+            for name in scan_times(folder):
+                new += self._created(case, folder, name)
+
+        return new
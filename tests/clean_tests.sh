@@ -1,2 +1,3 @@
 rm -r ./pytest_cavity_base
-rm -r ./pytest_breakthrough_base
\ No newline at end of file
+rm -r ./pytest_breakthrough_base
+rm -r ./pytest_sweep_run
\ No newline at end of file
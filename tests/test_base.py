@@ -1,7 +1,9 @@
 import os
+import asyncio
 from pathlib import Path
 import pytest
-from espuma import Case_Directory
+import shutil
+from espuma import Case_Directory, Line, Points, Plane
 
 FOAM_TUTORIALS = os.environ["FOAM_TUTORIALS"]
 TEMPLATE = f"{FOAM_TUTORIALS}/incompressible/icoFoam/cavity/cavity"
@@ -22,6 +24,32 @@ def test_case_directory():
     assert of_case.system.path.samefile(PATH / "system")
 
 
+def test_lazy_directories():
+    case = Case_Directory(PATH)
+    assert "system" not in case.__dict__
+
+    assert "controlDict" in dir(case.system)
+    assert "controlDict" not in case.system.__dict__
+    assert case.system.controlDict.path.samefile(PATH / "system/controlDict")
+
+    ## Files written after the folder was listed
+    shutil.copy(PATH / "system/controlDict", PATH / "system/controlDict.orig")
+    assert getattr(case.system, "controlDict.orig")
+
+    with pytest.raises(AttributeError):
+        case.system.missingDict
+
+    (PATH / "system/controlDict.orig").unlink()
+
+    ## Compressed files are not read
+    (PATH / "0/C.gz").write_bytes(b"")
+    try:
+        with pytest.raises(AttributeError, match="compressed"):
+            case.zero.C
+    finally:
+        (PATH / "0/C.gz").unlink()
+
+
 def test_zero_directory():
     assert getattr(of_case.zero, "p")
     assert getattr(of_case.zero, "U")
@@ -53,7 +81,7 @@ def test_vector_field():
     assert U["FoamFile.class"] == "volVectorField"
 
     assert str(U.dimensions) == "[0 1 -1 0 0 0 0]"
-    assert str(U.internalField) == "uniform ( 0 0 0 )"
+    assert str(U.internalField) == "uniform (0 0 0)"
     assert all(
         i in U.boundaryField.keys()
         for i in ("fixedWalls", "movingWall", "frontAndBack")
@@ -72,7 +100,7 @@ def test_constant_directory():
     )
 
     assert constant.transportProperties["FoamFile.class"] == "dictionary"
-    assert constant.transportProperties["nu"] == "[ 0 2 -1 0 0 0 0 ] 0.01"
+    assert constant.transportProperties["nu"] == "[0 2 -1 0 0 0 0] 0.01"
 
 
 def test_system_directory():
@@ -128,3 +156,147 @@ def test_run_solver():
 
 def test_vtk_import():
     assert of_case.get_vtk_reader()
+
+
+def test_export_incremental():
+    exported = of_case.export_to_xarray()
+    assert len(exported.time) == 5
+
+    with of_case.system.controlDict.edit() as control_dict:
+        control_dict["startFrom"] = "latestTime"
+        control_dict["endTime"] = 0.6
+
+    of_case._runCase()
+
+    refreshed = of_case.export_to_xarray(incremental=True)
+    assert len(refreshed.time) == 6
+    assert refreshed.time.values[-1] == pytest.approx(0.6)
+
+
+def test_clone_links_mesh(tmp_path):
+    template = tmp_path / "template"
+    shutil.copytree("./templates/breakthrough", template)
+    (template / "constant/polyMesh").mkdir()
+    (template / "constant/polyMesh/points").write_text("points")
+
+    clone = Case_Directory.clone_from_template(Case_Directory(template), tmp_path / "clone")
+
+    assert clone.zero.path.samefile(tmp_path / "clone/0")
+    assert (clone.path / "system/controlDict").exists()
+    assert (clone.path / "constant/transportProperties").stat().st_nlink == 1
+    assert (clone.path / "constant/polyMesh/points").read_text() == "points"
+
+    ## Never hardlinked, mesh tools write it in place
+    assert (clone.path / "constant/polyMesh/points").stat().st_nlink == 1
+
+
+def test_export_parallel():
+    serial = of_case.export_to_xarray().load()
+    shutil.rmtree(of_case.path / "postProcessing/espuma_as_netcdf")
+
+    parallel = of_case.export_to_xarray(max_workers=2).load()
+    assert serial.identical(parallel)
+
+
+def test_export_compressed():
+    exported = of_case.export_to_xarray()
+
+    assert exported["p"].encoding["zlib"]
+    assert exported["p"].encoding["chunksizes"][0] == len(exported.depth)
+
+    ## Selecting a few times does not read the whole variable
+    assert exported["p"].isel(time=[0, -1]).values.shape == (len(exported.depth), 2)
+
+
+def test_export_sampling():
+    line = of_case.export_to_xarray().load()
+    (xi, yi, zi, xf, yf, zf) = of_case.get_vtk_reader().read()["internalMesh"].bounds
+
+    samples = of_case.export_to_xarray(
+        sampling={
+            "vertical": Line((xi, yi, zi), (xi, yi, zf), n_points=len(line.depth)),
+            "points": Points([(0.05, 0.05, 0.005), (1.0, 1.0, 1.0)]),
+            "midplane": Plane("z", 0.005, resolution=(4, 5)),
+        }
+    )
+
+    vertical = samples["vertical"].load()
+    assert vertical["p"].values == pytest.approx(line["p"].values)
+    assert vertical["z"].values == pytest.approx(line["depth"].values + zi)
+
+    ## Outside the mesh
+    assert samples["points"]["p"].isnull().values[1].all()
+    assert samples["midplane"]["U_0"].shape == (20, len(line.time))
+
+
+def test_export_without_times(tmp_path):
+    case = Case_Directory.clone_from_template(of_case, tmp_path / "clone")
+
+    with pytest.raises(ValueError, match="No time steps"):
+        case.export_to_xarray(method="cells")
+
+
+def test_export_cells_requires_column():
+    with pytest.raises(ValueError):
+        of_case.export_to_xarray(method="cells")
+
+
+def test_export_cells(tmp_path):
+    breakthrough = Case_Directory("./templates/breakthrough")
+    case = Case_Directory.clone_from_template(breakthrough, tmp_path / "breakthrough")
+    case._blockMesh()
+    case._runCase()
+
+    cells = case.export_to_xarray(method="cells")
+
+    assert all(v in cells for v in ("T", "U_0", "U_1", "U_2"))
+    assert cells.sizes["depth"] == 100
+    assert (cells.depth.diff("depth") > 0).all()
+    assert cells.depth.values[0] == pytest.approx(0.005)
+
+
+def test_read_field():
+    U = of_case.read_field("U")
+    assert U.dims == ("time", "cell", "component")
+    assert U.shape == (len(of_case.list_times), of_case.mesh.n_cells, 3)
+    assert (of_case.path / "postProcessing/espuma_fields/U.dat").exists()
+
+    p = of_case.read_field("p", times=[0.1, 0.5], cells=slice(0, 10))
+    assert p.shape == (2, 10)
+    assert p.values == pytest.approx(of_case.read_field("p").sel(time=[0.1, 0.5]).values[:, :10])
+
+    with pytest.raises(FileNotFoundError, match="nope"):
+        of_case.read_field("nope")
+
+
+def test_run_async(tmp_path):
+    case = Case_Directory.clone_from_template(Case_Directory(TEMPLATE), tmp_path / "cavity")
+
+    exported = asyncio.run(case.run_async(steps=("blockMesh", "run", "export")))
+    assert len(exported.time) == 5
+
+    async def cancel():
+        task = asyncio.create_task(case.solve_async())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancel())
+
+
+def test_run_parallel(tmp_path):
+    case = Case_Directory.clone_from_template(Case_Directory(TEMPLATE), tmp_path / "cavity")
+    case._blockMesh()
+
+    case._runCase(n_processors=2, reconstruct=None)
+    assert case.is_decomposed
+    assert case.system.decomposeParDict["numberOfSubdomains"] == "2"
+    assert 0.5 in case.list_times
+
+    ## Read straight from the processor folders
+    decomposed = case.export_to_xarray().load()
+    assert len(decomposed.time) == 5
+
+    case._reconstructPar(latest_time=True)
+    assert 0.5 in [float(t) for t in case._foamListTimes()]
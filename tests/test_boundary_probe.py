@@ -1,3 +1,6 @@
+import pytest
+import shutil
+import numpy as np
 from espuma import Case_Directory, Boundary_Probe
 
 TEMPLATE = "./templates/breakthrough/"
@@ -37,20 +40,47 @@ def test_initialize():
 def test_boundary_probe():
     probe = Boundary_Probe(of_case, probe_dict=of_case.system.boundaryProbes)
 
-    assert probe.path_time.samefile(
-        of_case.path / "postProcessing/espuma_BoundaryProbes/time.txt"
+    assert probe.path_metadata.samefile(
+        of_case.path / "postProcessing/espuma_BoundaryProbes/metadata.json"
     )
 
-    assert probe.path_xyz.samefile(
-        of_case.path / "postProcessing/espuma_BoundaryProbes/xyz.txt"
+    assert probe.path_time.samefile(
+        of_case.path / "postProcessing/espuma_BoundaryProbes/time.dat"
     )
 
-    assert probe.path_field_names.samefile(
-        of_case.path / "postProcessing/espuma_BoundaryProbes/fields.txt"
-    )
+    assert all(path.suffix == ".dat" for path in probe.path_data)
 
     assert probe.n_fields == 4
     assert "T" in probe.field_names
     assert "U_0" in probe.field_names
     assert "U_1" in probe.field_names
     assert "U_2" in probe.field_names
+
+    data = probe.array_data
+    assert data["T"].shape == (probe.n_probes, len(probe.times))
+    assert data["U_0"].dims == ("probes", "time")
+
+    ## Memoized views over the cache
+    assert probe.times is probe.times
+    assert isinstance(probe.times, np.memmap)
+
+
+def test_boundary_probe_refresh():
+    probe = Boundary_Probe(of_case, probe_dict=of_case.system.boundaryProbes)
+    n_times = len(probe.times)
+
+    ## A new time written by a running simulation
+    source = of_case.path / "postProcessing/boundaryProbes"
+    last = max(source.iterdir(), key=lambda x: float(x.name))
+    new = source / str(float(last.name) + 1.0)
+    shutil.copytree(last, new)
+
+    try:
+        probe.refresh()
+        assert len(probe.times) == n_times + 1
+        assert probe.times[-1] == pytest.approx(float(last.name) + 1.0)
+        assert np.allclose(probe.array_data["T"][:, -1], probe.array_data["T"][:, -2])
+
+    finally:
+        shutil.rmtree(new)
+        shutil.rmtree(probe.path)
@@ -0,0 +1,313 @@
+import io
+import time
+import shutil
+import pytest
+import numpy as np
+from espuma import foam_parser
+from espuma.foam_parser import parse, parse_file, set_entry, remove_entry
+from espuma.base import OpenFoam_Dict, Dict_File, Field_File
+
+TEMPLATE = "./templates/breakthrough/"
+
+SAMPLE = b"""
+/* Header comment
+   spanning lines */
+FoamFile
+{
+    version     2.0;
+    class       dictionary; // trailing comment
+}
+
+nu              [0 2 -1 0 0 0 0] 0.01;
+internalField   uniform (0 0 -1e-3);
+divSchemes
+{
+    div(phi,U)      Gauss linear;
+    div((nuEff*dev2(T(grad(U))))) Gauss linear;
+}
+vertices
+(
+    (0 0 0)
+    (1 0 0)
+);
+fields ("T" "U");
+code #{ int a = 1; #};
+functions
+{
+    #includeFunc boundaryProbes
+};
+boundaryField
+{
+    "(top|bottom)" { type zeroGradient; }
+    left { type empty; }
+}
+"""
+
+
+def test_parse_entries():
+    d = parse(SAMPLE, dict_type=OpenFoam_Dict)
+
+    assert d["FoamFile.class"] == "dictionary"
+    assert d["nu"] == "[0 2 -1 0 0 0 0] 0.01"
+    assert d["internalField"] == "uniform (0 0 -1e-3)"
+    assert d["vertices"] == "(\n    (0 0 0)\n    (1 0 0)\n)"
+    assert d["fields"] == '("T" "U")'
+    assert d["code"] == "#{ int a = 1; #}"
+
+
+def test_parse_words_with_parentheses():
+    d = parse(SAMPLE)
+
+    assert d["divSchemes"]["div(phi,U)"] == "Gauss linear"
+    assert d["divSchemes"]["div((nuEff*dev2(T(grad(U)))))"] == "Gauss linear"
+
+
+def test_parse_directives():
+    d = parse(SAMPLE)
+    assert d["functions"] == {"#includeFunc": "boundaryProbes"}
+
+    d = parse(b'#include "a"\n#includeEtc "caseDicts/b" // etc\n#include "c"\nnu 1; // comment\n')
+    assert d == {"#include": '"a"', "#includeEtc": '"caseDicts/b"', "#include_2": '"c"', "nu": "1"}
+
+    ## Comments between tokens are replaced by a space
+    assert parse(b"value uniform /* x */ (1 2 3);")["value"] == "uniform (1 2 3)"
+
+
+def test_pattern_keywords():
+    d = parse(SAMPLE, dict_type=OpenFoam_Dict)
+
+    assert d["boundaryField.top.type"] == "zeroGradient"
+    assert d["boundaryField"]["bottom"]["type"] == "zeroGradient"
+    assert d["boundaryField.left.type"] == "empty"
+
+    with pytest.raises(KeyError):
+        d["boundaryField.right"]
+
+
+def test_parse_errors():
+    with pytest.raises(ValueError):
+        parse(b"a { b 1;")
+
+
+def test_template_files():
+    control_dict = Dict_File(TEMPLATE + "system/controlDict")
+    assert control_dict["application"] == "scalarTransportFoam"
+    assert control_dict["endTime"] == "0.1"
+    assert "functions" in control_dict.keys()
+
+    probes = Dict_File(TEMPLATE + "system/boundaryProbes")
+    assert probes["setFormat"] == "raw"
+    assert probes["fields"] == '("T")'
+    assert probes["patches"] == '("bottom")'
+
+    U = Field_File(TEMPLATE + "0/U")
+    assert str(U.dimensions) == "[0 1 -1 0 0 0 0]"
+    assert U.internalField == "uniform (0 0 -1e-3)"
+    assert U.boundaryField["top.type"] == "zeroGradient"
+
+    with pytest.raises(ValueError):
+        U["boundaryField.inlet"]
+
+    assert parse_file(TEMPLATE + "0/T")["FoamFile"]["object"] == "T"
+
+
+def test_set_entry():
+    text = set_entry(SAMPLE, "nu", "[0 2 -1 0 0 0 0] 0.02")
+    assert b"nu              [0 2 -1 0 0 0 0] 0.02;" in text
+    assert b"/* Header comment" in text
+    assert b"// trailing comment" in text
+
+    text = set_entry(text, "divSchemes.default", "none")
+    text = set_entry(text, "solvers.p.solver", "PCG")
+    d = parse(text, dict_type=OpenFoam_Dict)
+
+    assert d["nu"] == "[0 2 -1 0 0 0 0] 0.02"
+    assert d["divSchemes.default"] == "none"
+    assert d["divSchemes.div(phi,U)"] == "Gauss linear"
+    assert d["solvers.p.solver"] == "PCG"
+
+
+def test_remove_entry():
+    text = remove_entry(SAMPLE, "divSchemes.div(phi,U)")
+    text = remove_entry(text, "boundaryField")
+    d = parse(text)
+
+    assert "div(phi,U)" not in d["divSchemes"]
+    assert "boundaryField" not in d
+    assert d["functions"] == {"#includeFunc": "boundaryProbes"}
+
+    with pytest.raises(KeyError):
+        remove_entry(text, "boundaryField")
+
+
+def test_file_edit(tmp_path):
+    path = tmp_path / "controlDict"
+    shutil.copy(TEMPLATE + "system/controlDict", path)
+    control_dict = Dict_File(path)
+
+    assert control_dict["endTime"] == "0.1"
+
+    with control_dict.edit() as d:
+        d["endTime"] = 0.2
+        d["writeInterval"] = 10
+        d["functions.probes"] = {"type": "probes", "fields": "(T)"}
+        del d["purgeWrite"]
+        assert d["endTime"] == 0.2
+
+    assert control_dict["endTime"] == "0.2"
+    assert control_dict["writeInterval"] == "10"
+    assert control_dict["functions.probes.type"] == "probes"
+    assert control_dict["functions.#includeFunc"] == "boundaryProbes"
+    assert "purgeWrite" not in control_dict.keys()
+
+    with pytest.raises(RuntimeError):
+        with control_dict.edit() as d:
+            d["endTime"] = 0.3
+            raise RuntimeError
+
+    assert control_dict["endTime"] == "0.2"
+
+    with pytest.raises(ValueError):
+        del control_dict["purgeWrite"]
+
+
+FIELD_HEADER = """FoamFile
+{{
+    version     2.0;
+    format      {format};
+    arch        "LSB;label=32;scalar=64";
+    class       volVectorField;
+    object      U;
+}}
+dimensions      [0 1 -1 0 0 0 0];
+"""
+
+
+def test_nonuniform_lists(tmp_path):
+    U = np.arange(12, dtype=float).reshape(4, 3) / 10
+    T = np.linspace(0, 1, 4)
+
+    text = FIELD_HEADER.format(format="ascii") + (
+        "internalField   nonuniform List<vector> 4\n(\n"
+        + "\n".join(f"({x} {y} {z})" for x, y, z in U)
+        + "\n)\n;\n"
+        "boundaryField\n{\n"
+        "    top { type fixedValue; value nonuniform List<scalar> 4(" + " ".join(map(str, T)) + "); }\n"
+        "    bottom { type fixedValue; value nonuniform List<symmTensor> 2{(1 2 3 4 5 6)}; }\n"
+        "    left { type fixedValue; value nonuniform List<scalar> 0(); }\n"
+        "}\n"
+    )
+    path = tmp_path / "U"
+    path.write_text(text)
+
+    field = Field_File(path)
+    np.testing.assert_array_equal(field.internalField, U)
+    np.testing.assert_array_equal(field.boundaryField["top.value"], T)
+    assert field.boundaryField["top.type"] == "fixedValue"
+    assert field.boundaryField["bottom.value"].shape == (2, 6)
+    assert field.boundaryField["left.value"].shape == (0,)
+    assert str(field["internalField"]) == "nonuniform List<vector> 4(...)"
+    assert str(field.dimensions) == "[0 1 -1 0 0 0 0]"
+
+
+def test_binary_lists(tmp_path):
+    U = np.random.default_rng(0).random((5, 3))
+
+    path = tmp_path / "U"
+    with open(path, "wb") as f:
+        f.write(FIELD_HEADER.format(format="binary").encode())
+        f.write(b"internalField   nonuniform List<vector> \n5\n(")
+        f.write(U.tobytes())
+        f.write(b")\n;\nboundaryField\n{\n    top { type zeroGradient; }\n}\n")
+
+    field = Field_File(path)
+    assert isinstance(field.internalField, np.memmap)
+    np.testing.assert_array_equal(field.internalField, U)
+    assert field.boundaryField["top.type"] == "zeroGradient"
+
+
+def test_chunked_ascii(monkeypatch):
+    monkeypatch.setattr(foam_parser, "CHUNK_SIZE", 7)
+    values = np.arange(50, dtype=float) * 1.5
+    text = b"a List<scalar> 50(" + " ".join(map(str, values)).encode() + b");"
+
+    np.testing.assert_array_equal(np.asarray(parse(text)["a"]), values)
+
+
+def test_write_ascii(monkeypatch):
+    values = np.random.default_rng(2).random((200_000, 3))
+    header = {"format": "ascii"}
+
+    start = time.perf_counter()
+    f = io.BytesIO()
+    foam_parser.write_list(f, values, header)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = io.BytesIO()
+    np.savetxt(rows, values, fmt="(%.12g %.12g %.12g)")
+    row_by_row = time.perf_counter() - start
+
+    assert f.getvalue() == b"List<vector> \n200000\n(\n" + rows.getvalue() + b")\n"
+    assert elapsed < row_by_row
+
+    ## Split in chunks
+    monkeypatch.setattr(foam_parser, "CHUNK_SIZE", 100)
+    chunked = io.BytesIO()
+    foam_parser.write_list(chunked, values[:50], header)
+    np.testing.assert_allclose(np.asarray(parse(b"a " + chunked.getvalue() + b";")["a"]), values[:50], rtol=1e-11)
+
+
+def test_write_fields(tmp_path):
+    shutil.copytree(TEMPLATE + "0", tmp_path / "0")
+    U = Field_File(tmp_path / "0/U")
+    T = Field_File(tmp_path / "0/T")
+
+    values = np.random.default_rng(1).random((100, 3))
+    U.write_internal_field(values)
+    np.testing.assert_allclose(U.internalField, values, rtol=1e-11)
+    assert U["dimensions"] == "[0 1 -1 0 0 0 0]"
+
+    ## "top" is only matched by the "(top|bottom)" pattern
+    U.write_boundary_field("top", values[:2])
+    np.testing.assert_allclose(U.boundaryField["top.value"], values[:2], rtol=1e-11)
+    assert U.boundaryField["top.type"] == "zeroGradient"
+    assert U.boundaryField["bottom.type"] == "zeroGradient"
+
+    T["FoamFile.format"] = "binary"
+    T.write_internal_field(values[:, 0])
+    T.write_boundary_field("bottom", values[:3, 1], entry="gradient")
+    np.testing.assert_array_equal(T.internalField, values[:, 0])
+    np.testing.assert_array_equal(T.boundaryField["bottom.gradient"], values[:3, 1])
+    assert T.boundaryField["top.type"] == "uniformInletOutlet"
+
+    with pytest.raises(ValueError):
+        T.write_internal_field(np.zeros((3, 2)))
+
+
+def test_list_files(tmp_path):
+    path = tmp_path / "decomposeParDict"
+    path.write_text(
+        foam_parser.format_file(
+            {"numberOfSubdomains": 4, "method": "simple", "simpleCoeffs": {"n": "(2 2 1)"}},
+            {"object": "decomposeParDict"},
+        )
+    )
+    assert Dict_File(path)["simpleCoeffs.n"] == "(2 2 1)"
+
+    volumes = tmp_path / "V"
+    for binary in (False, True):
+        with open(volumes, "wb") as f:
+            header = {"format": "binary" if binary else "ascii", "class": "scalarField"}
+            f.write(foam_parser.format_file({}, header).encode())
+            foam_parser.write_list(f, np.linspace(0, 1, 5), header)
+
+        values = foam_parser.parse_list_file(volumes)
+        assert values.value_type == "scalar"
+        np.testing.assert_allclose(values, np.linspace(0, 1, 5))
+
+    owner = tmp_path / "owner"
+    owner.write_text(foam_parser.format_file({}, {"class": "labelList"}) + "5\n(0 1 2 3 4)\n")
+    cells = foam_parser.parse_list_file(owner)
+    assert cells.value_type == "label"
+    np.testing.assert_array_equal(cells, np.arange(5))
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from espuma.mesh import Poly_Mesh
+from espuma.foam_parser import format_file
+
+## Row of unit cubes along x, sheared and stretched
+N_CELLS = 3
+TRANSFORM = np.array([[2.0, 0.5, 0.0], [0.0, 1.0, 0.3], [0.0, 0.0, 0.5]])
+
+
+def write_mesh(path, compact=False):
+    path.mkdir(parents=True)
+    index = lambda i, j, k: i + (N_CELLS + 1) * (j + 2 * k)  # noqa: E731
+
+    points = np.array(
+        [(i, j, k) for k in (0, 1) for j in (0, 1) for i in range(N_CELLS + 1)], dtype=float
+    )
+
+    def quad(corners, outward):
+        corners = [index(*c) for c in corners]
+        a, b, c = points[corners[:3]]
+        return corners if np.cross(b - a, c - a) @ outward > 0 else corners[::-1]
+
+    faces, owner, neighbour = [], [], []
+
+    for i in range(1, N_CELLS):
+        faces.append(quad([(i, 0, 0), (i, 1, 0), (i, 1, 1), (i, 0, 1)], [1, 0, 0]))
+        owner.append(i - 1)
+        neighbour.append(i)
+
+    faces.append(quad([(0, 0, 0), (0, 1, 0), (0, 1, 1), (0, 0, 1)], [-1, 0, 0]))
+    owner.append(0)
+    faces.append(quad([(N_CELLS, 0, 0), (N_CELLS, 1, 0), (N_CELLS, 1, 1), (N_CELLS, 0, 1)], [1, 0, 0]))
+    owner.append(N_CELLS - 1)
+
+    for i in range(N_CELLS):
+        for axis, side in ((1, 0), (1, 1), (2, 0), (2, 1)):
+            corners = []
+            for a, b in ((0, 0), (1, 0), (1, 1), (0, 1)):
+                corner = [i + a, 0, 0]
+                corner[axis] = side
+                corner[3 - axis] = b
+                corners.append(corner)
+
+            outward = np.zeros(3)
+            outward[axis] = 1 if side else -1
+            faces.append(quad(corners, outward))
+            owner.append(i)
+
+    points = points @ TRANSFORM.T + [1.0, -2.0, 3.0]
+
+    def write(name, class_name, body):
+        (path / name).write_text(format_file({}, {"class": class_name, "object": name}) + body)
+
+    write("points", "vectorField", f"{len(points)}\n(\n" + "\n".join(f"({x} {y} {z})" for x, y, z in points) + "\n)\n")
+    write("owner", "labelList", f"{len(owner)}\n(" + " ".join(map(str, owner)) + ")\n")
+    write("neighbour", "labelList", f"{len(neighbour)}\n(" + " ".join(map(str, neighbour)) + ")\n")
+
+    if compact:
+        offsets = np.arange(len(faces) + 1) * 4
+        labels = np.concatenate(faces)
+        write(
+            "faces",
+            "faceCompactList",
+            f"{len(offsets)}\n(" + " ".join(map(str, offsets)) + f")\n{len(labels)}\n(" + " ".join(map(str, labels)) + ")\n",
+        )
+    else:
+        write("faces", "faceList", f"{len(faces)}\n(\n" + "\n".join(f"4({' '.join(map(str, f))})" for f in faces) + "\n)\n")
+
+    write(
+        "boundary",
+        "polyBoundaryMesh",
+        f"1\n(\n    walls\n    {{\n        type wall;\n        nFaces {len(faces) - len(neighbour)};\n"
+        f"        startFace {len(neighbour)};\n    }}\n)\n",
+    )
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_geometry(tmp_path, compact):
+    write_mesh(tmp_path / "polyMesh", compact)
+    mesh = Poly_Mesh(tmp_path / "polyMesh")
+
+    assert mesh.n_cells == N_CELLS
+    assert mesh.n_internal_faces == N_CELLS - 1
+    assert mesh.boundary["walls"]["startFace"] == N_CELLS - 1
+    assert np.all(np.diff(mesh.face_offsets) == 4)
+
+    expected = (np.arange(N_CELLS)[:, None] + 0.5) * [1, 0, 0] + [0, 0.5, 0.5]
+    np.testing.assert_allclose(mesh.cell_centres, expected @ TRANSFORM.T + [1.0, -2.0, 3.0])
+    np.testing.assert_allclose(mesh.cell_volumes, np.linalg.det(TRANSFORM))
+
+    ## Closed surface
+    walls = mesh.face_areas[mesh.patch_faces("walls")]
+    np.testing.assert_allclose(walls.sum(axis=0), 0, atol=1e-12)
+
+    assert mesh.cell_centres is mesh.cell_centres
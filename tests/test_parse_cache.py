@@ -0,0 +1,87 @@
+import os
+import time
+
+from espuma import parse_cache
+from espuma.base import Dict_File
+from espuma.foam_parser import format_file
+
+
+def write_dict(path, entries, age=10):
+    path.write_text(format_file(entries, {"object": path.name}))
+    mtime = time.time_ns() - age * 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_shared_between_objects(tmp_path):
+    path = tmp_path / "controlDict"
+    write_dict(path, {"endTime": 1})
+
+    first = Dict_File(path)
+    assert Dict_File(path)._dictionary is first._dictionary
+
+    ## Written by espuma
+    first["endTime"] = 2
+    assert Dict_File(path)["endTime"] == "2"
+
+    ## Written by something else
+    write_dict(path, {"endTime": 30})
+    assert first["endTime"] == "30"
+
+
+def test_lru(tmp_path):
+    parse_cache.set_parse_cache(max_entries=2)
+
+    try:
+        paths = [tmp_path / f"dict{i}" for i in range(3)]
+        for path in paths:
+            write_dict(path, {"a": 1})
+            Dict_File(path)._dictionary
+
+        assert [key[0] for key in parse_cache._entries] == [str(p) for p in paths[1:]]
+
+    finally:
+        parse_cache.set_parse_cache(max_entries=1024)
+
+
+def test_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setenv("ESPUMA_PARSE_CACHE", str(tmp_path / "cache"))
+    path = tmp_path / "controlDict"
+    write_dict(path, {"endTime": 1})
+
+    parse_cache.clear()
+    assert Dict_File(path)["endTime"] == "1"
+    assert len(list((tmp_path / "cache").rglob("*.pickle"))) == 1
+
+    ## As in another process
+    parse_cache.clear()
+    monkeypatch.setattr("espuma.base.parse_file", None)
+    assert Dict_File(path)["endTime"] == "1"
+
+
+def test_recently_modified(tmp_path, monkeypatch):
+    monkeypatch.setenv("ESPUMA_PARSE_CACHE", str(tmp_path / "cache"))
+    path = tmp_path / "controlDict"
+    write_dict(path, {"endTime": 1}, age=0)
+
+    first = Dict_File(path)
+    tree = first._dictionary
+
+    ## Hashed once for its pickle, then found by its stat alone
+    monkeypatch.setattr(parse_cache, "_digest", None)
+    assert Dict_File(path)._dictionary is tree
+
+    ## Written by espuma
+    first["endTime"] = 2
+    monkeypatch.undo()
+    assert Dict_File(path)["endTime"] == "2"
+
+
+def test_keywords_follow_changes(tmp_path):
+    path = tmp_path / "controlDict"
+    write_dict(path, {"endTime": 1})
+
+    first = Dict_File(path)
+    assert "startTime" not in first.keys()
+
+    Dict_File(path)["startTime"] = 0
+    assert "startTime" in first.keys()
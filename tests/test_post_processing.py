@@ -0,0 +1,79 @@
+import numpy as np
+from espuma import Post_Processing
+
+RESIDUALS = "# Residuals\n# Time\tp\tUx\tUy\n"
+
+
+def test_restarts(tmp_path):
+    residuals = tmp_path / "postProcessing/residuals"
+    (residuals / "0").mkdir(parents=True)
+    (residuals / "0.2").mkdir()
+
+    (residuals / "0/residuals.dat").write_text(
+        RESIDUALS + "0.1\t1\t1\tN/A\n0.2\t2\t2\tN/A\n0.3\t3\t3\tN/A\n"
+    )
+    (residuals / "0.2/residuals.dat").write_text(RESIDUALS + "0.2\t20\t20\tN/A\n0.3\t30\t30\tN/A\n")
+
+    post = Post_Processing(tmp_path)
+    assert list(post) == ["residuals"]
+
+    data = post["residuals"]
+    assert np.allclose(data.time, [0.1, 0.2, 0.3])
+    assert np.allclose(data["p"], [1, 20, 30])
+    assert np.isnan(data["Uy"]).all()
+
+    ## Cached until the sources change
+    assert (tmp_path / "postProcessing/espuma_post_processing/residuals.nc").exists()
+
+    with open(residuals / "0.2/residuals.dat", "a") as f:
+        f.write("0.4\t40\t40\tN/A\n")
+
+    assert np.allclose(post["residuals"]["p"], [1, 20, 30, 40])
+
+
+def test_probes_and_sets(tmp_path):
+    probes = tmp_path / "postProcessing/probes/0"
+    probes.mkdir(parents=True)
+    (probes / "U").write_text(
+        "# Probe 0 (0 0 0.1)\n# Probe 1 (0 0 0.5)\n#  Probe 0 1\n#  Time\n"
+        "0.1 (1 2 3) (4 5 6)\n0.2 (7 8 9) (10 11 12)\n"
+    )
+
+    for t in ("0.1", "0.2"):
+        sets = tmp_path / "postProcessing/sets" / t
+        sets.mkdir(parents=True)
+        (sets / "line_T.xy").write_text(f"0 0 0 {t}\n0 0 1 {t}\n0 0 2 {t}\n")
+
+    post = Post_Processing(tmp_path)
+
+    u = post["probes"]
+    assert u["U_2"].dims == ("time", "probe")
+    assert np.allclose(u["U_2"].sel(time=0.2), [9, 12])
+    assert np.allclose(u.z, [0.1, 0.5])
+
+    line = post["sets"]
+    assert line["T"].dims == ("time", "line")
+    assert np.allclose(line["T"].sel(time=0.2), 0.2)
+    assert np.allclose(line.line_z, [0, 1, 2])
+
+
+def test_sets_with_underscores(tmp_path):
+    (tmp_path / "system").mkdir()
+    (tmp_path / "system/controlDict").write_text(
+        "functions\n{\n    sets\n    {\n        type sets;\n        fields (p_rgh U);\n"
+        "        sets\n        (\n            line_X { type uniform; axis z; nPoints 2; }\n        );\n"
+        "    }\n}\n"
+    )
+
+    for t in ("0.1", "0.2"):
+        sets = tmp_path / "postProcessing/sets" / t
+        sets.mkdir(parents=True)
+        (sets / "line_X_p_rgh.xy").write_text(f"0 0 0 {t}\n0 0 1 {t}\n")
+        (sets / "line_X_U.xy").write_text("0 0 0 1 2 3\n0 0 1 4 5 6\n")
+
+    line = Post_Processing(tmp_path)["sets"]
+
+    assert line["p_rgh"].dims == ("time", "line_X")
+    assert np.allclose(line["p_rgh"].sel(time=0.2), 0.2)
+    assert np.allclose(line["U_2"].sel(time=0.1), [3, 6])
+    assert np.allclose(line.line_X_z, [0, 1])
@@ -0,0 +1,48 @@
+import sys
+
+import numpy as np
+import pyvista as pv
+
+from espuma.sampling import Interpolation, Line, Plane, Points
+
+
+def linear_mesh():
+    mesh = pv.ImageData(dimensions=(5, 4, 3), spacing=(0.5, 1.0, 2.0)).cast_to_unstructured_grid()
+    x, y, z = np.asarray(mesh.points).T
+    mesh.point_data["T"] = 1 + 2 * x - y + 0.5 * z
+    mesh.point_data["U"] = np.stack([x, y, z], axis=1)
+    return mesh
+
+
+def test_interpolation(tmp_path, monkeypatch):
+    mesh = linear_mesh()
+    points = np.concatenate(
+        [
+            Line((0.1, 0.2, 0.3), (1.9, 2.9, 3.9), n_points=7).points(mesh.bounds),
+            Plane("y", 1.5, resolution=(3, 2)).points(mesh.bounds),
+            Points([(10.0, 0.0, 0.0)]).points(mesh.bounds),
+        ]
+    )
+
+    interpolation = Interpolation.cached(mesh, points, tmp_path)
+    sampled = interpolation(mesh)
+
+    x, y, z = points[:-1].T
+    np.testing.assert_allclose(sampled["T"][:-1], 1 + 2 * x - y + 0.5 * z)
+    np.testing.assert_allclose(sampled["U_2"][:-1], z)
+    assert np.isnan(sampled["T"][-1])
+
+    ## Saved, and applied the same without scipy
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    monkeypatch.setitem(sys.modules, "scipy.sparse", None)
+    saved = Interpolation.cached(mesh, points, tmp_path)
+    assert saved._matrix is None
+
+    for name, values in saved(mesh).items():
+        np.testing.assert_allclose(values, sampled[name])
+
+    ## Same points and number of cells, in another order
+    cells = mesh.cells.reshape(mesh.n_cells, -1)[::-1]
+    reordered = pv.UnstructuredGrid(cells.ravel(), mesh.celltypes[::-1], mesh.points)
+    Interpolation.cached(reordered, points, tmp_path)
+    assert len(list(tmp_path.glob("*.npz"))) == 2
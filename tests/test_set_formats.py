@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+from espuma.set_formats import READERS, get_reader, register_reader
+
+XYZ = np.array([[0.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+U = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+
+def test_csv(tmp_path):
+    path = tmp_path / "points_U.csv"
+    path.write_text("x,y,z,U_0,U_1,U_2\n0,0,0,1,2,3\n0,0,1,4,5,6\n")
+
+    names, values = get_reader("csv").read(path, ["U"])
+    assert names == ["U_0", "U_1", "U_2"]
+    assert np.array_equal(values, np.hstack([XYZ, U]))
+
+
+def test_raw(tmp_path):
+    path = tmp_path / "points_T_U.xy"
+    np.savetxt(path, np.hstack([XYZ, U[:, :2]]))
+
+    names, values = get_reader("raw").read(path, ["U", "T"])
+    assert names == ["T", "U"]
+    assert values.shape == (2, 5)
+
+    assert get_reader("xy") == get_reader("raw")
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_vtk(tmp_path, binary):
+    path = tmp_path / "points_U.vtk"
+
+    def block(a, dtype):
+        return a.astype(dtype).tobytes() + b"\n" if binary else b" ".join(b"%g" % x for x in a.ravel()) + b"\n"
+
+    with open(path, "wb") as f:
+        f.write(b"# vtk DataFile Version 2.0\npoints_U\n" + (b"BINARY" if binary else b"ASCII"))
+        f.write(b"\nDATASET POLYDATA\nPOINTS 2 double\n" + block(XYZ, ">f8"))
+        f.write(b"LINES 1 3\n" + block(np.array([2, 0, 1]), ">i4"))
+        f.write(b"POINT_DATA 2\nFIELD attributes 1\nU 3 2 float\n" + block(U, ">f4"))
+
+    names, values = get_reader("vtk").read(path, ["U"])
+    assert names == ["U_0", "U_1", "U_2"]
+    assert np.array_equal(values, np.hstack([XYZ, U]))
+
+
+def test_register_reader():
+    with pytest.raises(NotImplementedError):
+        get_reader("gnuplot")
+
+    @register_reader("gnuplot", suffix=".gplt")
+    def read_gnuplot(path, fields):
+        return [], np.empty((0, 3))
+
+    assert get_reader("gnuplot").suffix == ".gplt"
+    READERS.pop("gnuplot")
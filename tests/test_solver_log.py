@@ -0,0 +1,84 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from espuma.base import Case_Directory, run_solver
+from espuma.solver_log import Solver_Log, Solver_Run
+
+LOG = """Create time
+
+Courant Number mean: 0.01 max: 0.1
+deltaT = 0.001
+Time = 0.001
+
+DILUPBiCG:  Solving for Ux, Initial residual = 1, Final residual = 1e-06, No Iterations 2
+GAMG:  Solving for p, Initial residual = 0.5, Final residual = 1e-03, No Iterations 10
+GAMG:  Solving for p, Initial residual = 0.1, Final residual = 1e-07, No Iterations 5
+ExecutionTime = 0.5 s  ClockTime = 1 s
+
+Courant Number mean: 0.02 max: 0.2
+deltaT = 0.002
+Time = 0.003
+
+GAMG:  Solving for p, Initial residual = 0.05, Final residual = 1e-08, No Iterations 7
+ExecutionTime = 0.9 s  ClockTime = 1 s
+
+End
+"""
+
+
+def test_parse_log(tmp_path):
+    (tmp_path / "log").write_text(LOG)
+    log = Solver_Log.from_file(tmp_path / "log")
+
+    assert log.finished
+    assert len(log) == 2
+
+    step = log.steps[0]
+    assert step.time == 0.001
+    assert step.courant_max == 0.1
+    assert step.initial_residuals == {"Ux": 1.0, "p": 0.5}
+    assert step.final_residuals["p"] == 1e-07
+    assert step.iterations["p"] == 15
+
+    data = log.to_xarray()
+    assert np.allclose(data.time, [0.001, 0.003])
+    assert np.allclose(data["delta_t"], [0.001, 0.002])
+    assert np.isnan(data["Ux_initial"].values[1])
+    assert np.allclose(data["execution_time"], [0.5, 0.9])
+
+
+def test_feed_returns_steps():
+    log = Solver_Log()
+    steps = [log.feed(line) for line in LOG.splitlines()]
+
+    completed = [s for s in steps if s is not None]
+    assert [s.time for s in completed] == [0.001, 0.003]
+
+
+def test_run_solver_deprecated(tmp_path):
+    with pytest.deprecated_call():
+        value = run_solver(["sh", "-c", "echo out; echo failed >&2; exit 3"], cwd=tmp_path)
+
+    assert value.returncode == 3
+    assert value.stderr.strip() == "failed"
+
+
+def test_callbacks_see_every_step(tmp_path, monkeypatch):
+    ## Stopped within the last step, which is only complete when the output ends
+    (tmp_path / "log").write_text(LOG.partition("ExecutionTime = 0.9")[0])
+    for folder in ("0", "constant", "system"):
+        (tmp_path / folder).mkdir()
+
+    case = Case_Directory(tmp_path)
+    monkeypatch.setattr(case, "_solver_command", lambda n_processors=1: ["cat", "log"])
+
+    times = []
+    asyncio.run(case.solve_async(callbacks=(lambda step: times.append(step.time),)))
+    assert times == [0.001, 0.003]
+
+    times.clear()
+    with Solver_Run(["cat", "log"], tmp_path, callbacks=(lambda step: times.append(step.time),)) as solver:
+        solver.wait()
+    assert times == [0.001, 0.003]
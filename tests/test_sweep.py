@@ -0,0 +1,61 @@
+import json
+import warnings
+
+import pytest
+from espuma import Case_Directory, Sweep
+
+TEMPLATE = "./templates/breakthrough/"
+PATH = "./tests/pytest_sweep"
+
+
+def test_parameter_grid():
+    of_tpl = Case_Directory(TEMPLATE)
+
+    sweep = Sweep(
+        of_tpl,
+        PATH,
+        {
+            "constant.transportProperties.DT": ["DT [0 2 -1 0 0 0 0] 0.01", "DT [0 2 -1 0 0 0 0] 0.02"],
+            "system.controlDict.endTime": [0.01, 0.02],
+        },
+    )
+
+    assert len(sweep.variants) == 4
+    assert sweep.names[0] == "case_0000"
+    assert sweep.variants[3]["system.controlDict.endTime"] == 0.02
+    assert all(state == "pending" for state in sweep.status.values())
+
+    with pytest.raises(ValueError):
+        Sweep(of_tpl, PATH, {"controlDict.endTime": [1.0]})
+
+    with pytest.raises(ValueError):
+        Sweep(of_tpl, PATH, {"system.controlDict.endTime": [1.0]}, steps=["mesh"])
+
+
+def test_run_sweep():
+    of_tpl = Case_Directory(TEMPLATE)
+    parameters = [
+        {"system.controlDict.endTime": 0.01, "system.controlDict.writeInterval": 10},
+        {"system.controlDict.endTime": 0.02, "system.controlDict.writeInterval": 10},
+    ]
+
+    sweep = Sweep(of_tpl, PATH + "_run", parameters, max_workers=2)
+    status = sweep.run()
+
+    assert all(state == "finished" for state in status.values())
+    assert all(case.is_finished() for case in sweep.cases)
+
+    with open(sweep.path / "sweep.json") as f:
+        assert json.load(f)["cases"]["case_0001"]["status"] == "finished"
+
+    ## Resuming does not run anything again
+    resumed = Sweep(of_tpl, PATH + "_run", parameters)
+    assert resumed.status == status
+
+    ## Cases with different times are aligned without warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        results = sweep.to_xarray()
+
+    assert results.sizes["case"] == 2
+    assert list(results["system.controlDict.endTime"].values) == [0.01, 0.02]
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+from espuma import time_folders
+from espuma.time_folders import Time_Watcher, scan_times
+
+
+def test_scan_times(tmp_path):
+    for name in ("0", "0.5", "1e-1", "10", "constant", "0.orig", "1_0", "nan"):
+        (tmp_path / name).mkdir()
+    (tmp_path / "2").touch()
+
+    assert scan_times(tmp_path) == ["0", "1e-1", "0.5", "10"]
+
+    ## Cached on the modification time of the directory
+    old = 1_000_000_000_000_000_000
+    os.utime(tmp_path, ns=(old, old))
+    scan_times(tmp_path)
+    assert time_folders._scans[str(tmp_path)][0] == old
+
+    (tmp_path / "20").mkdir()
+    assert scan_times(tmp_path)[-1] == "20"
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="inotify is only available on Linux")
+def test_time_watcher(tmp_path):
+    case = tmp_path / "case"
+    (case / "0").mkdir(parents=True)
+
+    with Time_Watcher([case]) as watcher:
+        assert watcher.poll() == []
+
+        (case / "0.1").mkdir()
+        (case / "log").touch()
+        (case / "processor0/0.2").mkdir(parents=True)
+        assert watcher.poll(timeout=1) == [(case, 0.1), (case, 0.2)]
+
+        (case / "processor0/0.3").mkdir()
+        (case / "0.2").mkdir()
+        (case / "0.3").mkdir()
+        assert watcher.poll(timeout=1) == [(case, 0.3)]